@@ -1,43 +1,90 @@
 #!/usr/bin/env python3
 """Python Flask Application Module: RESTFul API"""
 
-from flask import Flask, jsonify, g
+from flask import Flask, jsonify, g, request
 from flask_cors import CORS
 from api.v1.views import app_views
 from api.v1.config import AppConfig
+from api.v1.utils.json_provider import JSONProvider
+from api.v1.utils.compression import Compress
+from api.v1.utils.docs import Docs
 from os import getenv
-from flasgger import Swagger
-from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models import storage
+from models.engine.profiler import profiler, SQL_PROFILE
+from models.user.hasher import HasherOverloaded
+
+# reverse proxies in front of the app whose X-Forwarded-For is trusted,
+# 0 takes the connecting address as the client address
+TRUSTED_PROXIES = int(getenv('TRUSTED_PROXIES', 0))
 
 app = Flask(__name__)
+if TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 app.url_map.strict_slashes = False
-app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+app.json = JSONProvider(app)
 app.config.from_object(AppConfig)
 app.register_blueprint(app_views)
 CORS(app, resources={r'/v1/*': {'origins': '*'}},
      supports_credentials=True)
+Compress(app)
 
-Swagger(app)
+Docs(app)
 
 
 @app.teardown_appcontext
 def close_storage(exception=None):
     """Close any active SQLAlchemy sessions"""
+    if exception is not None:
+        storage.end_unit(commit=False)
     storage.close()
 
 
+@app.after_request
+def commit_storage(response):
+    """Commits the request's unit of work once, unless it failed"""
+    try:
+        storage.end_unit(commit=response.status_code < 500)
+    except SQLAlchemyError:
+        return app.make_response(server_error(None))
+    return response
+
+
+@app.before_request
+def start_query_profile():
+    """Records the SQL statements of the request when SQL_PROFILE"""
+    if SQL_PROFILE:
+        profiler.start('{} {}'.format(request.method, request.url_rule))
+
+
+@app.after_request
+def query_profile_headers(response):
+    """Exposes the request's query count and DB time as headers"""
+    stats = profiler.current
+    if stats is not None:
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers['X-DB-Time'] = '{:.3f}ms'.format(stats.total_ms)
+    return response
+
+
+@app.teardown_request
+def stop_query_profile(exception=None):
+    """Logs slow/N+1 findings and keeps the request summary"""
+    profiler.stop()
+
+
 @app.before_request
 def app_setup_context():
     """App Setup Context"""
+    storage.begin_unit()
     auth = app.config['AUTH']
     g.auth = auth
 
     # if user, get user
     try:
         g.user = auth.current_user()
-        setattr(g.user, 'last_session', datetime.utcnow())
-        g.user.save()
+        storage.touch(g.user, 'last_session')
     except ValueError:
         g.user = None
     except AttributeError:
@@ -124,6 +171,20 @@ def unprocessable_entity(error) -> str:
     }), 422
 
 
+@app.errorhandler(429)
+def too_many_requests(error) -> str:
+    """Too Many Requests Error Handler"""
+    response = jsonify({
+        "status": "error",
+        "message": "Too Many Requests",
+        "data": None
+    })
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
 @app.errorhandler(500)
 def server_error(error) -> str:
     """Internal Server Error Handler"""
@@ -134,6 +195,26 @@ def server_error(error) -> str:
     }), 500
 
 
+@app.errorhandler(HasherOverloaded)
+def hasher_overloaded(error) -> str:
+    """Password hashing overload handler"""
+    response = jsonify({
+        "status": "error",
+        "message": "Service Unavailable: too many password checks, "
+                   "retry shortly",
+        "data": None
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+@app.cli.command('create-db')
+def create_db():
+    """Creates the missing tables and indexes of every model"""
+    storage.create_all()
+    print('Database schema created')
+
+
 if __name__ == '__main__':
     app.run(
         host='0.0.0.0',
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point: serve with an ASGI server, e.g.
+$ uvicorn api.v1.asgi:application --workers 2
+"""
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from concurrent.futures import ThreadPoolExecutor
+from api.v1.app import app
+from os import getenv
+
+# threads running the /v1 routes concurrently, per process
+ASGI_THREADS = int(getenv('ASGI_THREADS', 32))
+
+executor = ThreadPoolExecutor(max_workers=ASGI_THREADS,
+                              thread_name_prefix='asgi')
+
+
+class ThreadedWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """
+    asgiref's WSGI instance runs every request on one shared thread
+    (thread_sensitive=True), this one on a thread of `executor`
+    """
+
+    # the plain function asgiref wraps (functools.update_wrapper)
+    _run_sync = WsgiToAsgiInstance.__dict__['run_wsgi_app'].__wrapped__
+
+    async def run_wsgi_app(self, body):
+        """Runs the WSGI application for `body` on `executor`"""
+        await sync_to_async(self._run_sync, thread_sensitive=False,
+                            executor=executor)(body)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi running requests concurrently on a thread pool"""
+
+    async def __call__(self, scope, receive, send):
+        """Serves one ASGI connection"""
+        await ThreadedWsgiToAsgiInstance(
+            self.wsgi_application, self.duplicate_header_limit
+        )(scope, receive, send)
+
+
+# the event loop handles slow clients and idle keep-alive connections
+# while up to ASGI_THREADS /v1 requests run at once on `executor`
+application = ThreadedWsgiToAsgi(app)
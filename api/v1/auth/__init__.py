@@ -4,6 +4,7 @@ from os import getenv
 from models.user import User
 from models import storage
 from models.user.auth import UserAuth
+from api.v1.auth.principal import Principal
 
 
 AUTH_TOKEN_NAME_ON_HEADER = getenv('AUTH_TOKEN_NAME_ON_HEADER', 'x-token')
@@ -32,6 +33,25 @@ class Auth:
                 break
         return user
 
+    def principal_for_user(self, id: str) -> any:
+        """
+        Returns the user with a matching id as a Principal built from
+        the model's PRINCIPAL_ATTRS, read through the storage snapshot
+        cache, so most requests never load the full user
+        """
+        user = None
+        for model in USER_MODELS:
+            attrs = getattr(model, 'PRINCIPAL_ATTRS', None)
+            if attrs is None:
+                user = storage.get(model, id)
+            else:
+                snapshot = storage.snapshot(model, id, attrs)
+                if snapshot is not None:
+                    user = Principal(model, **snapshot)
+            if user is not None:
+                break
+        return user
+
     def reset_user_password(self, encoded_token: str, new_password: str):
         """Restes user password"""
         user = None
@@ -58,3 +78,9 @@ class Auth:
 
     def destroy_session(self):
         pass
+
+    def destroy_all_sessions(self, user_id: str) -> int:
+        pass
+
+    def sessions(self, user_id: str) -> list:
+        pass
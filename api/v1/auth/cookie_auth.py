@@ -23,7 +23,7 @@ class CookieAuth(Auth):
         user_id = self.get_user_id()
         if user_id is None:
             raise ValueError('user_id not found')
-        return self.id_for_user(id=user_id)
+        return self.principal_for_user(id=user_id)
 
     def destroy_session(self, session=session):
         """Destroys session if exists"""
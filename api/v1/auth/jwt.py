@@ -1,24 +1,65 @@
 #!/usr/bin/env python3
 """Session Auth using Redis key, value store"""
 from api.v1.auth import Auth, AUTH_TOKEN_NAME_ON_HEADER, AUTH_TTL
+from models.engine.cache import LRUCache
 from flask import request
 import jwt
 from jwt.exceptions import ExpiredSignatureError
 from jwt import InvalidTokenError
 from datetime import datetime, timedelta
+from hashlib import blake2b
+from time import monotonic, time
+from typing import Dict
+from os import getenv
 
 
 token_name = AUTH_TOKEN_NAME_ON_HEADER
 
+# verified tokens kept per process, 0 verifies every request
+JWT_CACHE_SIZE = int(getenv('JWT_CACHE_SIZE', 4096))
+# revoke tokens on logout through a Redis denylist
+JWT_DENYLIST = getenv('JWT_DENYLIST', 'False') == 'True'
+# seconds a cached token is trusted before the denylist is checked again
+JWT_DENYLIST_CHECK = float(getenv('JWT_DENYLIST_CHECK', 5))
+
 
 class JWT(Auth):
-    """Session Auth Class"""
+    """
+    Session Auth Class. Verified tokens are cached, by digest, until
+    their `exp`; revoked ones are listed in Redis until then.
+    """
+
+    denylist_key = 'jwt_denylist:{}'
 
-    def __init__(self, secret_key: str) -> None:
+    def __init__(self, secret_key: str, redis=None,
+                 cache_size: int = JWT_CACHE_SIZE,
+                 denylist_check: float = JWT_DENYLIST_CHECK) -> None:
         """Intializes Session Auth instance"""
         self.secret_key = secret_key
+        self.redis = redis
+        self.denylist_check = denylist_check
+        self.__verified = LRUCache(maxsize=cache_size, ttl=int(AUTH_TTL))
+        self.hits = 0
+        self.misses = 0
         super().__init__()
 
+    @staticmethod
+    def digest(token: str) -> str:
+        """Returns the cache/denylist key of `token`"""
+        return blake2b(token.encode('utf-8'), digest_size=20).hexdigest()
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """Returns the verified tokens cache hits and misses"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.__verified)}
+
+    def revoked(self, digest: str) -> bool:
+        """Returns True if the token of `digest` is denylisted"""
+        if self.redis is None:
+            return False
+        return bool(self.redis.exists(self.denylist_key.format(digest)))
+
     def create_session(self, user_id: str = None) -> str:
         """Creates a session for user_id"""
         if user_id is None:
@@ -42,6 +83,22 @@ class JWT(Auth):
             raise ValueError(
                 'Missing {token_name}'.format(token_name=token_name))
 
+        digest = self.digest(token)
+        cached = self.__verified.get(digest)
+        if cached is not None:
+            user_id, exp, checked_until = cached
+            if exp <= time():
+                self.__verified.pop(digest)
+                raise ValueError('Expired Signature, please log in again.')
+            if monotonic() >= checked_until:
+                if self.revoked(digest):
+                    self.__verified.pop(digest)
+                    raise ValueError('Invalid JWT Token')
+                cached[2] = monotonic() + self.denylist_check
+            self.hits += 1
+            return user_id
+
+        self.misses += 1
         try:
             payload = jwt.decode(jwt=token, key=self.secret_key,
                                  algorithms=['HS256'])
@@ -49,10 +106,17 @@ class JWT(Auth):
             raise ValueError('Expired Signature, please log in again.')
         except InvalidTokenError:
             raise ValueError('Invalid JWT Token')
+        if self.revoked(digest):
+            raise ValueError('Invalid JWT Token')
 
         user_id = payload.get('user_id')
         if user_id is None:
             return None
+        exp = payload.get('exp')
+        if exp is not None:
+            self.__verified.set(digest, [
+                user_id, exp, monotonic() + self.denylist_check
+            ], ttl=exp - time())
         return user_id
 
     def get_token_from_headers(self, request=request) -> str:
@@ -70,8 +134,26 @@ class JWT(Auth):
         )
         if user_id is None:
             raise ValueError('user_id not found')
-        return self.id_for_user(id=user_id)
+        return self.principal_for_user(id=user_id)
 
     def destroy_session(self):
-        """Destroys session if exists"""
-        pass
+        """
+        Revokes the request token until it expires, when denylisted.
+        Without a valid token there is nothing to revoke, the logout
+        still succeeds as it always has for stateless tokens.
+        """
+        token = request.headers.get(token_name)
+        if token is None:
+            return None
+        digest = self.digest(token)
+        self.__verified.pop(digest)
+        if self.redis is None:
+            return None
+        try:
+            payload = jwt.decode(jwt=token, key=self.secret_key,
+                                 algorithms=['HS256'])
+        except InvalidTokenError:
+            return None
+        ttl = int(payload.get('exp', time() + int(AUTH_TTL)) - time()) + 1
+        self.redis.set(self.denylist_key.format(digest), 1, ex=max(ttl, 1))
+        return None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Principal: the authenticated user as a compact snapshot"""
+from models import storage
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+class Principal:
+    """
+    The `PRINCIPAL_ATTRS` of an authenticated user. Any other
+    attribute, and any assignment, loads the full ORM object first,
+    on demand. Only set_committed skips it.
+    """
+
+    def __init__(self, model, **snapshot) -> None:
+        """Initializes Principal instance"""
+        self.__dict__['model'] = model
+        self.__dict__['_snapshot'] = snapshot
+        self.__dict__['_obj'] = None
+
+    @property
+    def obj(self):
+        """Returns the ORM object if already loaded, else None"""
+        return self._obj
+
+    def load(self):
+        """Returns the ORM object, loading it on first call"""
+        if self._obj is None:
+            self.__dict__['_obj'] = storage.get(self.model,
+                                                self._snapshot['id'])
+        return self._obj
+
+    def set_committed(self, name: str, value) -> None:
+        """Sets `name` without marking the ORM object dirty"""
+        self._snapshot[name] = value
+        if self._obj is not None:
+            set_committed_value(self._obj, name, value)
+
+    def __getattr__(self, name: str):
+        snapshot = self.__dict__['_snapshot']
+        if name in snapshot:
+            return snapshot[name]
+        if name.startswith('__'):
+            raise AttributeError(name)
+        obj = self.load()
+        if obj is None:
+            raise AttributeError(name)
+        return getattr(obj, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in self._snapshot:
+            self._snapshot[name] = value
+        setattr(self.load(), name, value)
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, 'id', None) == self.id and \
+            getattr(other, 'model', other.__class__) is self.model
+
+    def __hash__(self) -> int:
+        return hash((self.model, self.id))
+
+    def __repr__(self) -> str:
+        return '<Principal {} {}>'.format(self.model.__name__, self.id)
@@ -1,31 +1,96 @@
 #!/usr/bin/env python3
 """Session Auth using Redis key, value store"""
 from api.v1.auth import Auth, AUTH_TOKEN_NAME_ON_HEADER, AUTH_TTL
+from models.engine.cache import LRUCache
+from datetime import datetime, timezone
+from hashlib import sha256
+from threading import Event, Lock, Thread
+from time import time
+from typing import Dict, List
 from uuid import uuid4
 from flask import request
+from os import getenv
+import atexit
+import logging
 
 
 token_name = AUTH_TOKEN_NAME_ON_HEADER
 
+# seconds before an active session's expiry is pushed back again,
+# 0 keeps fixed expiries
+SESSION_REFRESH_INTERVAL = float(getenv('SESSION_REFRESH_INTERVAL', 300))
+# seconds between batched writes of the pending refreshes
+SESSION_REFRESH_FLUSH = float(getenv('SESSION_REFRESH_FLUSH', 5))
+
+# deletes every session listed in a user's index, and the index, at once
+DESTROY_ALL_SESSIONS = """
+local tokens = redis.call('zrange', KEYS[1], 0, -1)
+for _, token in ipairs(tokens) do
+    redis.call('del', ARGV[1] .. token)
+end
+redis.call('del', KEYS[1])
+return #tokens
+"""
+
+# deletes one session and its entry in its user's index, returns 1 if
+# it existed
+DESTROY_SESSION = """
+local user_id = redis.call('get', KEYS[1])
+if not user_id then
+    return 0
+end
+redis.call('del', KEYS[1])
+redis.call('zrem', ARGV[1] .. user_id, ARGV[2])
+return 1
+"""
+
+logger = logging.getLogger(__name__)
+
 
 class SessionAuth(Auth):
-    """Session Auth Class"""
+    """
+    Session Auth Class. Each session is a `key` holding the user id;
+    the sorted set `index_key` of every user maps their tokens to
+    their expiry timestamps.
+    """
 
     key = 'flask_session_auth_tokens:{}'
+    index_key = 'flask_session_auth_users:{}'
 
-    def __init__(self, redis) -> None:
+    def __init__(self, redis,
+                 refresh_interval: float = SESSION_REFRESH_INTERVAL,
+                 refresh_flush: float = SESSION_REFRESH_FLUSH) -> None:
         """Intializes Session Auth instance"""
         self.redis = redis
+        self.refresh_interval = refresh_interval
+        self.refresh_flush = refresh_flush
+        self.__refreshed = LRUCache(maxsize=10000, ttl=refresh_interval)
+        self.__pending = {}
+        self.__lock = Lock()
+        self.__thread = None
+        self.__stopped = Event()
+        atexit.register(self.stop)
         super().__init__()
 
+    @staticmethod
+    def session_id(token: str) -> str:
+        """Returns a public identifier of `token`"""
+        return sha256(token.encode('utf-8')).hexdigest()[:16]
+
     def create_session(self, user_id: str = None) -> str:
         """Creates a session for user_id"""
         if user_id is None:
             raise ValueError('Missing user_id')
 
+        ttl = int(AUTH_TTL)
         token = str(uuid4())
-        self.redis.set(self.key.format(token), user_id)
-        self.redis.expire(self.key.format(token), int(AUTH_TTL))
+        index = self.index_key.format(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self.key.format(token), user_id, ex=ttl)
+        pipe.zadd(index, {token: time() + ttl})
+        pipe.zremrangebyscore(index, '-inf', time())
+        pipe.expire(index, ttl)
+        pipe.execute()
         return token
 
     def get_user_id(self, token: str = None) -> str:
@@ -37,7 +102,70 @@ class SessionAuth(Auth):
         user_id: bytes = self.redis.get(self.key.format(token))
         if user_id is None:
             return None
-        return user_id.decode('utf-8')
+        user_id = user_id.decode('utf-8')
+        self.refresh(token, user_id)
+        return user_id
+
+    def refresh(self, token: str, user_id: str) -> None:
+        """
+        Queues the sliding expiry refresh of an active session, written
+        by a daemon thread every `refresh_flush` seconds
+        """
+        if self.refresh_interval <= 0:
+            return
+        if self.__refreshed.get(token) is not None:
+            return
+        self.__refreshed.set(token, True)
+        with self.__lock:
+            self.__pending[token] = user_id
+        if self.refresh_flush <= 0:
+            self.flush_refreshes()
+        elif self.__thread is None or not self.__thread.is_alive():
+            self.__start()
+
+    def __start(self) -> None:
+        """Starts the refresh flushing thread, again in a forked worker"""
+        with self.__lock:
+            if self.__thread is not None and self.__thread.is_alive():
+                return
+            self.__thread = Thread(target=self.__run, daemon=True,
+                                   name='session-refresh')
+            self.__thread.start()
+
+    def __run(self) -> None:
+        """Flushes the queued refreshes until stopped"""
+        while not self.__stopped.wait(self.refresh_flush):
+            try:
+                self.flush_refreshes()
+            except Exception:
+                logger.exception('Session refresh flush failed')
+
+    def stop(self) -> None:
+        """Stops the flushing thread and writes what is left"""
+        self.__stopped.set()
+        try:
+            self.flush_refreshes()
+        except Exception:
+            logger.exception('Session refresh flush failed')
+
+    def flush_refreshes(self) -> int:
+        """Pushes back the expiry of the queued sessions in one batch"""
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        if len(pending) == 0:
+            return 0
+
+        ttl = int(AUTH_TTL)
+        expires_at = time() + ttl
+        pipe = self.redis.pipeline(transaction=False)
+        for token, user_id in pending.items():
+            index = self.index_key.format(user_id)
+            pipe.expire(self.key.format(token), ttl)
+            # xx: a session revoked meanwhile is not listed again
+            pipe.zadd(index, {token: expires_at}, xx=True)
+            pipe.expire(index, ttl)
+        pipe.execute()
+        return len(pending)
 
     def get_token_from_headers(self, request=request) -> str:
         """Returns a token from request.headers"""
@@ -54,7 +182,7 @@ class SessionAuth(Auth):
         )
         if user_id is None:
             raise ValueError('user_id not found')
-        return self.id_for_user(id=user_id)
+        return self.principal_for_user(id=user_id)
 
     def destroy_session(self):
         """Destroys session if exists"""
@@ -62,8 +190,43 @@ class SessionAuth(Auth):
         if token is None:
             raise ValueError(
                 'Missing {token_name}'.format(token_name=token_name))
-        resp = self.redis.delete(self.key.format(token))
-        if not resp:
+        destroy = self.redis.register_script(DESTROY_SESSION)
+        if not destroy(keys=[self.key.format(token)],
+                       args=[self.index_key.format(''), token]):
             raise ValueError(
                 'Invalid {token_name}'.format(token_name=token_name))
         return None
+
+    def destroy_all_sessions(self, user_id: str) -> int:
+        """
+        Destroys every session of user_id, returns their number. One
+        script lists and deletes them atomically, so no session
+        created meanwhile outlives its dropped index entry.
+        """
+        destroy = self.redis.register_script(DESTROY_ALL_SESSIONS)
+        return int(destroy(keys=[self.index_key.format(user_id)],
+                           args=[self.key.format('')]))
+
+    def sessions(self, user_id: str) -> List[Dict[str, any]]:
+        """Returns the active sessions of user_id, current one first"""
+        try:
+            current = self.get_token_from_headers()
+        except (ValueError, RuntimeError):
+            current = None
+        index = self.index_key.format(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zremrangebyscore(index, '-inf', time())
+        pipe.zrange(index, 0, -1, withscores=True)
+        tokens = pipe.execute()[1]
+
+        sessions = []
+        for token, expires_at in tokens:
+            token = token.decode('utf-8')
+            sessions.append({
+                "id": self.session_id(token),
+                "current": token == current,
+                "expires_at": datetime.fromtimestamp(
+                    expires_at, timezone.utc).replace(tzinfo=None),
+            })
+        sessions.sort(key=lambda x: not x['current'])
+        return sessions
@@ -1,9 +1,6 @@
 #!/usr/bin/env python3
 """Flask Application Config"""
 from models.user import Role
-from api.v1.auth.session_auth import SessionAuth
-from api.v1.auth.cookie_auth import CookieAuth
-from api.v1.auth.jwt import JWT
 from os import getenv
 from models import redis
 
@@ -12,19 +9,36 @@ AUTH_TOKEN_NAME_ON_HEADER = getenv(
 )
 
 
+def auth_backend(auth_type: str):
+    """Builds the Auth backend of `auth_type`, and only that one"""
+    if auth_type == 'cookie':
+        from api.v1.auth.cookie_auth import CookieAuth
+        return CookieAuth()
+    if auth_type == 'token':
+        from api.v1.auth.session_auth import SessionAuth
+        return SessionAuth(redis=redis)
+    if auth_type == 'jwt':
+        from api.v1.auth.jwt import JWT, JWT_DENYLIST
+        return JWT(secret_key=getenv('API_SECRET_KEY', '#hj8i-s0jjsndu2'),
+                   redis=redis if JWT_DENYLIST else None)
+    raise KeyError(auth_type)
+
+
 class AppConfig:
     USER_ROLES = list(Role)
-    AUTH = {
-        'cookie': CookieAuth(),
-        'token': SessionAuth(redis=redis),
-        'jwt': JWT(secret_key=getenv('API_SECRET_KEY', '#hj8i-s0jjsndu2')),
-    }[getenv('AUTH_TYPE')]
+    AUTH = auth_backend(getenv('AUTH_TYPE'))
     SECRET_KEY = getenv('API_SECRET_KEY', '#hj8i-s0jjsndu2')
     SWAGGER = {
         'title': 'Kamva Mindpal Backend API Documentation',
         'description': "This project is built using Python Flask, ensured to have python3 and python3-pip installed and optionally python3-venv. Depending on your OS, read how to install these packages on your Machince. \n\n`[NB: protected routes are opened in testing except routes bounded to a user specific actions]`",
         'hide_top_bar': True,
         'specs_route': '/v1/docs',
+        'specs': [
+            {
+                'endpoint': 'apispec',
+                'route': '/v1/docs/apispec.json',
+            }
+        ],
         'securityDefinitions': {
             'Auth': {
                 'type': 'apiKey',
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Response compression for the flask application. gzip is always
+available, brotli and zstd are offered when their packages are
+installed.
+"""
+from flask import Flask, Response, request
+from typing import Dict, Iterator
+from os import getenv
+from dotenv import load_dotenv
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+load_dotenv()
+
+COMPRESS = getenv('COMPRESS', 'True') == 'True'
+# bodies smaller than this many bytes are sent as is
+COMPRESS_MIN_SIZE = int(getenv('COMPRESS_MIN_SIZE', 500))
+COMPRESS_LEVEL = int(getenv('COMPRESS_LEVEL', 6))
+# streamed bodies are flushed to the client every this many input bytes
+COMPRESS_STREAM_BUFFER = int(getenv('COMPRESS_STREAM_BUFFER', 16384))
+# content types that are already compressed
+SKIP_MIMETYPES = ('image/', 'video/', 'audio/', 'font/woff',
+                  'application/zip', 'application/gzip',
+                  'application/pdf', 'application/octet-stream')
+
+
+class GzipCodec:
+    """gzip stream"""
+
+    def __init__(self, level: int = COMPRESS_LEVEL) -> None:
+        """Initializes GzipCodec instance"""
+        self.__obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Returns the compressed part of `data` available so far"""
+        return self.__obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Returns the pending output of the data compressed so far"""
+        return self.__obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """Returns the rest of the output and ends the stream"""
+        return self.__obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCodec:
+    """brotli stream"""
+
+    def __init__(self, level: int = 4) -> None:
+        """Initializes BrotliCodec instance"""
+        self.__obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        """Returns the compressed part of `data` available so far"""
+        return self.__obj.process(data)
+
+    def flush(self) -> bytes:
+        """Returns the pending output of the data compressed so far"""
+        return self.__obj.flush()
+
+    def finish(self) -> bytes:
+        """Returns the rest of the output and ends the stream"""
+        return self.__obj.finish()
+
+
+class ZstdCodec:
+    """zstd stream"""
+
+    def __init__(self, level: int = 3) -> None:
+        """Initializes ZstdCodec instance"""
+        self.__obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """Returns the compressed part of `data` available so far"""
+        return self.__obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Returns the pending output of the data compressed so far"""
+        return self.__obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        """Returns the rest of the output and ends the stream"""
+        return self.__obj.flush()
+
+
+def codecs() -> Dict[str, type]:
+    """Returns the available codecs, most preferred first"""
+    available = {}
+    if brotli is not None:
+        available['br'] = BrotliCodec
+    if zstandard is not None:
+        available['zstd'] = ZstdCodec
+    available['gzip'] = GzipCodec
+    return available
+
+
+class Compress:
+    """
+    Compresses responses in the encoding negotiated from the request
+    `Accept-Encoding`, streamed responses chunk by chunk
+    """
+
+    def __init__(self, app: Flask = None, min_size: int = COMPRESS_MIN_SIZE,
+                 buffer: int = COMPRESS_STREAM_BUFFER) -> None:
+        """Initializes Compress instance"""
+        self.min_size = min_size
+        self.buffer = buffer
+        self.codecs = codecs()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Compresses the responses of `app`"""
+        if COMPRESS:
+            app.after_request(self.after_request)
+
+    def encoding(self) -> str:
+        """Returns the best encoding the client accepts, or None"""
+        return request.accept_encodings.best_match(list(self.codecs))
+
+    @staticmethod
+    def skip(response: Response) -> bool:
+        """Returns True if `response` must be sent as is"""
+        return any([
+            request.method == 'HEAD',
+            response.status_code < 200,
+            response.status_code in (204, 206, 304),
+            'Content-Encoding' in response.headers,
+            (response.mimetype or '').startswith(SKIP_MIMETYPES),
+        ])
+
+    def after_request(self, response: Response) -> Response:
+        """Compresses `response` if worth it"""
+        if self.skip(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.encoding()
+        if encoding is None:
+            return response
+
+        codec = self.codecs[encoding]()
+        if response.is_streamed:
+            response.response = self.stream(
+                response.iter_encoded(), codec, response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressed = codec.compress(data) + codec.finish()
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stream(self, chunks: Iterator[bytes], codec,
+               source=None) -> Iterator[bytes]:
+        """Yields the compressed `chunks` of a streamed response"""
+        try:
+            pending = 0
+            for chunk in chunks:
+                out = codec.compress(chunk)
+                pending += len(chunk)
+                if pending >= self.buffer:
+                    out += codec.flush()
+                    pending = 0
+                if out:
+                    yield out
+            yield codec.finish()
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
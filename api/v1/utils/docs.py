@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+API documentation served from a spec compiled once, either ahead of
+time by `flask --app api.v1.app build-docs` or on the first request.
+"""
+from flask import Flask, Response, request
+from hashlib import blake2b
+from threading import Lock
+from os import getenv, path
+from dotenv import load_dotenv
+import json
+
+load_dotenv()
+
+# production workers may skip the docs machinery entirely
+DOCS = getenv('DOCS', 'True') == 'True'
+DOCS_SPEC_FILE = getenv('DOCS_SPEC_FILE', path.join(
+    path.dirname(path.dirname(path.abspath(__file__))), 'apispec.json'))
+DOCS_MAX_AGE = int(getenv('DOCS_MAX_AGE', 86400))
+
+if DOCS:
+    from flasgger import swag_from
+else:
+    def swag_from(*args, **kwargs):
+        """No-op stand-in of flasgger's swag_from when not DOCS"""
+        return lambda function: function
+
+
+class Docs:
+    """
+    Swagger UI at the SWAGGER `specs_route` whose spec endpoints serve
+    a compiled, serialized spec instead of merging the YAML files of
+    every route on request
+    """
+
+    def __init__(self, app: Flask = None,
+                 spec_file: str = DOCS_SPEC_FILE) -> None:
+        """Initializes Docs instance"""
+        self.spec_file = spec_file
+        self.swagger = None
+        self.__specs = {}
+        self.__lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Registers the docs views on `app` when DOCS"""
+        app.cli.command('build-docs')(self.build)
+        if not DOCS:
+            return
+        from flasgger import Swagger
+
+        self.swagger = Swagger(app)
+        for endpoint in self.swagger.endpoints:
+            app.view_functions['flasgger.' + endpoint] = \
+                self.view(endpoint)
+
+    def compile(self, endpoint: str) -> bytes:
+        """Returns the serialized spec of `endpoint`"""
+        if path.isfile(self.spec_file):
+            with open(self.spec_file, 'rb') as f:
+                specs = json.load(f)
+            if endpoint in specs:
+                return json.dumps(specs[endpoint],
+                                  separators=(',', ':')).encode('utf-8')
+        return json.dumps(self.swagger.get_apispecs(endpoint),
+                          separators=(',', ':')).encode('utf-8')
+
+    def spec(self, endpoint: str) -> tuple:
+        """Returns the (body, etag) of `endpoint`, compiled once"""
+        spec = self.__specs.get(endpoint)
+        if spec is None:
+            with self.__lock:
+                spec = self.__specs.get(endpoint)
+                if spec is None:
+                    body = self.compile(endpoint)
+                    spec = (body, blake2b(body, digest_size=16).hexdigest())
+                    self.__specs[endpoint] = spec
+        return spec
+
+    def view(self, endpoint: str):
+        """Returns the view serving the spec of `endpoint`"""
+        def apispec():
+            body, etag = self.spec(endpoint)
+            response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = DOCS_MAX_AGE
+            return response.make_conditional(request)
+        return apispec
+
+    def build(self) -> None:
+        """Compiles the API spec to DOCS_SPEC_FILE."""
+        if self.swagger is None:
+            raise SystemExit('Set DOCS=True to build the API spec')
+        app = self.swagger.app
+        with app.test_request_context():
+            specs = {endpoint: self.swagger.get_apispecs(endpoint)
+                     for endpoint in self.swagger.endpoints}
+        with open(self.spec_file, 'w') as f:
+            json.dump(specs, f, separators=(',', ':'))
+        print('API spec written to {}'.format(self.spec_file))
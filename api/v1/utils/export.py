@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Streaming export of listings as NDJSON or CSV, this module is
+written to be used in a flask application.
+"""
+from flask import request, Response, stream_with_context, current_app
+from typing import Callable, Iterable, Iterator
+from io import StringIO
+import csv
+
+NDJSON = 'application/x-ndjson'
+CSV = 'text/csv'
+
+
+def export_mimetype(request=request) -> str:
+    """Returns the streaming export type the client asked for, or None"""
+    mimetype = request.accept_mimetypes.best_match(
+        ['application/json', NDJSON, CSV])
+    if mimetype in (NDJSON, CSV):
+        return mimetype
+    return None
+
+
+def ndjson_lines(items: Iterable, func: Callable) -> Iterator[str]:
+    """Yields one compact JSON document per item"""
+    dumps = current_app.json.dumps
+    for item in items:
+        yield dumps(func(item)) + '\n'
+
+
+def csv_lines(items: Iterable, func: Callable) -> Iterator[str]:
+    """Yields a CSV header then one CSV line per item"""
+    buffer = StringIO()
+    writer = None
+    for item in items:
+        row = func(item)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()),
+                                    extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export(items: Iterable, mimetype: str, func: Callable,
+           name: str = 'export') -> Response:
+    """Returns a streamed response writing `items` as they are read"""
+    if mimetype == CSV:
+        lines = csv_lines(items, func)
+        response = Response(stream_with_context(lines), mimetype=CSV)
+        response.headers['Content-Disposition'] = \
+            'attachment; filename={}.csv'.format(name)
+        return response
+    return Response(stream_with_context(ndjson_lines(items, func)),
+                    mimetype=NDJSON)
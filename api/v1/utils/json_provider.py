@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compact, fast JSON provider for the flask application. orjson is used
+when installed, the stdlib encoder otherwise.
+"""
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from datetime import datetime, date
+from enum import Enum
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default(obj):
+    """Serializes the types the models hand over unconverted"""
+    if isinstance(obj, datetime):
+        return obj.isoformat() + '+0000'
+    if isinstance(obj, date):
+        return obj.isoformat() + 'T00:00+0000'
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+        type(obj).__name__))
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Writes compact JSON, pretty-printed only when a request asks for
+    it with `?pretty=true`
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def pretty() -> bool:
+        """Returns True if the current request wants indented output"""
+        return has_request_context() and \
+            request.args.get('pretty') == 'true'
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize data as JSON to a string"""
+        return self.dumpb(obj, indent=kwargs.get('indent')).decode('utf-8')
+
+    def dumpb(self, obj, indent: int = None) -> bytes:
+        """Serialize data as JSON to bytes"""
+        if orjson is not None:
+            option = orjson.OPT_PASSTHROUGH_DATETIME | \
+                orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=default, option=option)
+        if indent:
+            return json.dumps(obj, default=default, indent=indent,
+                              ensure_ascii=False).encode('utf-8')
+        return json.dumps(obj, default=default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as a JSON response"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumpb(obj, indent=2 if self.pretty() else None)
+        return self._app.response_class(body + b'\n',
+                                        mimetype=self.mimetype)
@@ -2,7 +2,10 @@
 """Get post/put data from flask request"""
 
 from flask import request
-from typing import Dict
+from typing import Dict, List
+from io import StringIO
+import csv
+import json
 
 
 def postdata() -> Dict[str, str]:
@@ -25,3 +28,32 @@ def postjson() -> Dict[str, str]:
 def postform() -> Dict[str, str]:
     """Return obj of <class 'dict'> or None"""
     return request.form
+
+
+def postrows() -> List[Dict[str, str]]:
+    """
+    Return list of rows of <class 'dict'> from a JSON array,
+    NDJSON or CSV body (or uploaded `file`), or None
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        body = upload.read().decode('utf-8-sig')
+        mimetype = upload.mimetype
+        if upload.filename and upload.filename.endswith('.csv'):
+            mimetype = 'text/csv'
+        elif upload.filename and upload.filename.endswith('.ndjson'):
+            mimetype = 'application/x-ndjson'
+    else:
+        body = request.get_data(as_text=True)
+        mimetype = request.mimetype
+
+    try:
+        if mimetype == 'text/csv':
+            return list(csv.DictReader(StringIO(body)))
+        if mimetype == 'application/x-ndjson':
+            return [json.loads(line) for line in body.splitlines()
+                    if line.strip()]
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data if isinstance(data, list) else None
@@ -11,3 +11,4 @@ app_views = Blueprint('v1', __name__, url_prefix='/v1')
 
 from api.v1.views.users import *  # noqa
 from api.v1.views.authentication import *  # noqa
+from api.v1.views.debug import *  # noqa
@@ -1,17 +1,20 @@
 #!/usr/bin/env python3
 """Authentication routes"""
 
-from api.v1.views import app_views, postdata, mail
+from api.v1.views import app_views, postdata, mail, login_required
 from flask import jsonify, abort, render_template, g
-from flasgger import swag_from
+from api.v1.utils.docs import swag_from
 from api.v1.auth import AUTH_TOKEN_NAME_ON_HEADER
 from api.v1.auth import Auth
+from api.v1.views.utils.rate_limit import rate_limit
 from models.user.status import Status
 
 DOC_PATH = 'docs/auth/'
 
 
 @app_views.route('/login', methods=['POST'])
+@rate_limit(20, 60, key='ip')
+@rate_limit(5, 60, key='email')
 @swag_from(DOC_PATH + 'login.yaml')
 def user_login():
     """Validates user login and creates a session if exists"""
@@ -57,6 +60,8 @@ def user_login():
 
 
 @app_views.route('/reset', methods=['POST'])
+@rate_limit(10, 3600, key='ip')
+@rate_limit(3, 3600, key='email')
 @swag_from(DOC_PATH + 'post_reset.yaml')
 def reset_user_password():
     """Generates and send a reset token to User's email"""
@@ -88,6 +93,7 @@ def reset_user_password():
 
 @app_views.route('/reset/<encoded_token>', methods=['PUT'],
                  strict_slashes=False)
+@rate_limit(10, 600, key='ip')
 @swag_from(DOC_PATH + 'put_reset.yaml')
 def change_user_password(encoded_token):
     """Changes User Password"""
@@ -139,3 +145,43 @@ def logout():
         "message": "Logout success",
         "data": None
     }), 200
+
+
+@app_views.route('/sessions', methods=['GET'], strict_slashes=False)
+@login_required()
+@swag_from(DOC_PATH + 'get_sessions.yaml')
+def get_sessions():
+    """Lists the active sessions of the logged in user"""
+    auth: Auth = g.auth
+    sessions = auth.sessions(g.user.id)
+    if sessions is None:
+        return jsonify({
+            "status": "error",
+            "message": "Sessions are not tracked by this authentication",
+            "data": None
+        }), 400
+    return jsonify({
+        "status": "success",
+        "message": "Sessions retrieved successfully",
+        "data": sessions
+    }), 200
+
+
+@app_views.route('/sessions', methods=['DELETE'], strict_slashes=False)
+@login_required()
+@swag_from(DOC_PATH + 'delete_sessions.yaml')
+def logout_everywhere():
+    """Clears every session of the logged in user"""
+    auth: Auth = g.auth
+    count = auth.destroy_all_sessions(g.user.id)
+    if count is None:
+        return jsonify({
+            "status": "error",
+            "message": "Sessions are not tracked by this authentication",
+            "data": None
+        }), 400
+    return jsonify({
+        "status": "success",
+        "message": "Logout success",
+        "data": {"sessions": count}
+    }), 200
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Debug URI Module"""
+
+from flask import abort
+from api.v1.views import app_views, jsonify, login_required
+from models.user import Role
+from models.engine.profiler import profiler, SQL_PROFILE
+from api.v1.utils.docs import swag_from
+
+DOC_PATH = 'docs/debug/'
+
+
+@app_views.route('/debug/queries', methods=['GET'])
+@login_required([Role.administrator])
+@swag_from(DOC_PATH + 'get_queries.yaml')
+def get_query_profiles():
+    """Returns the SQL profiles of the most recent requests"""
+    if not SQL_PROFILE:
+        abort(404)
+    return jsonify({
+        "status": "success",
+        "message": "Query profiles retrieved successfully",
+        "data": list(profiler.recent)
+    }), 200
@@ -4,62 +4,105 @@
 from flask import abort, g, request
 from api.v1.views import (
     app_views, storage, jsonify, postdata,
-    login_required, pagination,
+    login_required,
 )
 from models.user import User, Role
-from sqlalchemy.exc import IntegrityError
-from typing import List, Dict
-from flasgger import swag_from
+from api.v1.auth.principal import Principal
+from models.engine.query import ListQuery
+from models.engine.serializer import Serializer
+from api.v1.views.utils.conditional import conditional, conditional_list
+from api.v1.utils.export import export, export_mimetype
+from api.v1.utils.postdata import postrows
+from models.user.importer import import_users
+from api.v1.utils.docs import swag_from
 
 DOC_PATH = 'docs/users/'
 
 
 @app_views.route('/users', methods=['GET'])
 @login_required()
+@conditional_list(User)
 @swag_from(DOC_PATH + 'get_users.yaml')
 def get_users():
     """Return all users in storage"""
 
     detailed = request.args.get('detailed') == 'true'
+    serializer = Serializer.for_class(User, detailed)
+
+    try:
+        query = ListQuery.from_args(User, request.args)
+
+        # page=all may be streamed row by row as NDJSON/CSV
+        mimetype = export_mimetype()
+        if query.page == 'all' and mimetype is not None:
+            return export(storage.stream(User, query=query,
+                                         serializer=serializer),
+                          mimetype, func=lambda x: x, name='users')
+
+        data = storage.paginated(User, query=query, serializer=serializer)
+    except ValueError as exc:
+        return jsonify({
+            "status": "error",
+            "message": str(exc),
+            "data": None
+        }), 400
 
-    users: List[User] = storage.all(User).values()
     return jsonify({
         "status": "success",
         "message": "Users retrieved successfully",
-        "data": pagination(
-            items=users,
-            func=lambda x: x.to_dict(detailed=detailed)
-        )
+        "data": data
+    }), 200
+
+
+@app_views.route('/users/import', methods=['POST'])
+@login_required([Role.administrator])
+@swag_from(DOC_PATH + 'import_users.yaml')
+def bulk_import_users():
+    """Creates users in bulk from a JSON array, NDJSON or CSV upload"""
+
+    rows = postrows()
+    if rows is None:
+        abort(400)
+
+    report = import_users(rows, upsert=request.args.get('upsert') == 'true')
+    return jsonify({
+        "status": "success",
+        "message": "Users imported successfully",
+        "data": report
     }), 200
 
 
 @app_views.route('/users/<user_id>', methods=['GET'])
 @login_required()
+@conditional(User, 'user_id')
 @swag_from(DOC_PATH + 'get_user.yaml')
 def get_user(user_id):
     """Returns a User with a matching user_id"""
     detailed = request.args.get('detailed') == 'true'
 
-    user: User = storage.get(User, user_id)
-    if user is None:
+    data = storage.serialized(User, user_id, detailed=detailed)
+    if data is None:
         abort(404)
     return jsonify({
         "status": "success",
         "message": "User retrieved successfully",
-        "data": user.to_dict(detailed=detailed)
+        "data": data
     }), 200
 
 
 @app_views.route('/users/me', methods=['GET'])
 @login_required()
+@conditional(User)
 @swag_from(DOC_PATH + 'get_me.yaml')
 def get_current_user():
     """Returns a User that is currently logged"""
 
     detailed = request.args.get('detailed', False) == 'true'
     user: User = g.user
+    obj = user.obj if isinstance(user, Principal) else user
     return jsonify({
         "status": "success",
         "message": "User retrieved successfully",
-        "data": user.to_dict(detailed=detailed)
+        "data": storage.serialized(User, user.id, detailed=detailed,
+                                   obj=obj)
     }), 200
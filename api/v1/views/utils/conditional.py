@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Conditional GET (ETag / Last-Modified) Wrappers"""
+from flask import g, request, make_response, Response
+from functools import wraps
+from datetime import datetime, timezone
+from hashlib import blake2b
+from models import storage
+from models.engine.query import ListQuery
+from api.v1.utils.export import export_mimetype
+
+
+def make_etag(*parts) -> str:
+    """Returns an opaque tag of `parts` and the requested URL"""
+    digest = blake2b(digest_size=16)
+    for part in parts + (request.full_path,):
+        digest.update(str(part).encode('utf-8') + b'|')
+    return digest.hexdigest()
+
+
+def not_modified(etag: str, last_modified: datetime = None) -> Response:
+    """Returns a 304 response if the client copy is current, or None"""
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0,
+                                              tzinfo=timezone.utc)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    response = Response(status=304)
+    tag(response, etag, last_modified)
+    return response
+
+
+def tag(response: Response, etag: str,
+        last_modified: datetime = None) -> Response:
+    """Sets the validators of a successful `response`"""
+    if response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        if last_modified is not None:
+            response.last_modified = last_modified.replace(
+                tzinfo=timezone.utc)
+    return response
+
+
+def conditional(cls, id_arg: str = None):
+    """
+    Wrapper of single resource views, answers 304 from the `cls` row
+    updated_at before the view runs. The row id is the `id_arg` view
+    argument, or the logged in user when `id_arg` is None.
+    """
+    def conditional_wrapper(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if id_arg is not None:
+                id = kwargs.get(id_arg)
+                updated_at = storage.get(cls, id, attr='updated_at')
+            else:
+                id = getattr(g.user, 'id', None)
+                updated_at = getattr(g.user, 'updated_at', None)
+            if updated_at is None:
+                return f(*args, **kwargs)
+
+            etag = make_etag(cls.__name__, id, updated_at.isoformat())
+            response = not_modified(etag, updated_at)
+            if response is not None:
+                return response
+            return tag(make_response(f(*args, **kwargs)), etag, updated_at)
+        return decorated_function
+    return conditional_wrapper
+
+
+def conditional_list(cls):
+    """
+    Wrapper of list views, answers 304 from the count and latest
+    updated_at of the rows matching the request filters. Only the
+    ETag is sent and checked, a deleted row leaves the latest
+    updated_at unchanged so If-Modified-Since alone can't tell. The
+    ETag covers the negotiated type (JSON, NDJSON or CSV) and the
+    responses vary on Accept.
+    """
+    def conditional_wrapper(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                query = ListQuery.from_args(cls, request.args)
+            except ValueError:
+                return f(*args, **kwargs)
+            count, updated_at = storage.version(cls, query=query)
+
+            etag = make_etag(cls.__name__, count, updated_at,
+                             export_mimetype() or 'application/json')
+            response = not_modified(etag)
+            if response is None:
+                response = tag(make_response(f(*args, **kwargs)), etag)
+            response.vary.add('Accept')
+            return response
+        return decorated_function
+    return conditional_wrapper
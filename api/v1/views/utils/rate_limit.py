@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Rate Limiting Wrapper"""
+from flask import g, request, abort
+from functools import wraps
+from math import ceil
+from threading import Lock
+from time import time, monotonic
+from typing import Callable, Dict
+from redis.exceptions import RedisError
+from models import redis
+from models.engine.cache import LRUCache
+from api.v1.utils.postdata import postdata
+from os import getenv
+
+RATE_LIMIT = getenv('RATE_LIMIT', 'True') == 'True'
+# seconds Redis is bypassed after an error, counting in process instead
+RATE_LIMIT_BACKOFF = float(getenv('RATE_LIMIT_BACKOFF', 5))
+
+
+def ip_key() -> str:
+    """
+    Returns the client address, read from X-Forwarded-For only when
+    TRUSTED_PROXIES is set (see api.v1.app)
+    """
+    return request.remote_addr
+
+
+def email_key() -> str:
+    """Returns the email of the request body, if any"""
+    data = postdata() or {}
+    email = data.get('email')
+    return email.lower() if isinstance(email, str) else None
+
+
+def user_key() -> str:
+    """Returns the id of the logged in user, if any"""
+    return getattr(g.get('user'), 'id', None)
+
+
+KEYS: Dict[str, Callable[[], str]] = {
+    'ip': ip_key,
+    'email': email_key,
+    'user': user_key,
+}
+
+
+class SlidingWindow:
+    """
+    Sliding window counters: the count of the current fixed window
+    plus the share of the previous one still inside the window. Kept
+    in Redis, or in process while Redis is unreachable.
+    """
+
+    key = 'rate_limit:{}:{}:{}'
+
+    def __init__(self, redis=None, backoff: float = RATE_LIMIT_BACKOFF):
+        """Initializes SlidingWindow instance"""
+        self.redis = redis
+        self.backoff = backoff
+        self.__local = LRUCache(maxsize=10000, ttl=3600)
+        self.__lock = Lock()
+        self.__down_until = 0
+
+    def hit(self, name: str, limit: int, period: int) -> float:
+        """
+        Counts a hit of `name` and returns 0 if under `limit` per
+        `period` seconds, else the seconds to wait before retrying
+        """
+        now = time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current, previous = self.__count(name, window, period)
+        weight = (period - elapsed) / period
+        if previous * weight + current <= limit:
+            return 0
+        # when the previous window's share has decayed enough
+        if previous > 0 and current <= limit:
+            wait = (previous * weight + current - limit) / previous * period
+            return max(min(wait, period - elapsed), 1)
+        return max(period - elapsed, 1)
+
+    def __count(self, name: str, window: int, period: int) -> tuple:
+        """Increments the current window, returns (current, previous)"""
+        if self.redis is not None and monotonic() >= self.__down_until:
+            key = self.key.format(name, period, window)
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.incr(key)
+                pipe.expire(key, period * 2)
+                pipe.get(self.key.format(name, period, window - 1))
+                current, _, previous = pipe.execute()
+                return int(current), int(previous or 0)
+            except RedisError:
+                self.__down_until = monotonic() + self.backoff
+        with self.__lock:
+            current = self.__local.get((name, period, window), 0) + 1
+            self.__local.set((name, period, window), current,
+                             ttl=period * 2)
+            return current, self.__local.get((name, period, window - 1), 0)
+
+
+limiter = SlidingWindow(redis=redis)
+
+
+def rate_limit(limit: int, period: int = 60, key: str = 'ip'):
+    """
+    Wrapper answering 429 with Retry-After once the `key` (ip, email
+    or user) of a request exceeds `limit` requests per `period`
+    seconds on the wrapped route, before the view runs
+    """
+    key_func = KEYS[key]
+
+    def rate_limit_wrapper(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            value = key_func() if RATE_LIMIT else None
+            if value is not None:
+                name = '{}:{}:{}'.format(f.__name__, key, value)
+                wait = limiter.hit(name, limit, period)
+                if wait > 0:
+                    abort(429, retry_after=ceil(wait))
+            return f(*args, **kwargs)
+        return decorated_function
+    return rate_limit_wrapper
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Import-time / cold-start benchmark of the API, each run in a fresh
+interpreter:
+$ python benchmarks/cold_start.py [runs]
+Prints the median/min milliseconds spent importing `api.v1.app` and
+answering the first request.
+"""
+from statistics import median
+from os import path
+import subprocess
+import json
+import sys
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+from api.v1.app import app
+imported = time.perf_counter()
+app.test_client().get('/v1/users')
+served = time.perf_counter()
+print(json.dumps({"import": (imported - started) * 1000,
+                  "first_request": (served - imported) * 1000}))
+'''
+
+
+def run() -> dict:
+    """Returns the timings of one cold start"""
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT,
+                            check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int = 10) -> None:
+    """Prints the median and min timings of `runs` cold starts"""
+    results = [run() for _ in range(runs)]
+    for key in ('import', 'first_request'):
+        values = [result[key] for result in results]
+        print('{:<14} median {:8.1f}ms  min {:8.1f}ms'.format(
+            key, median(values), min(values)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
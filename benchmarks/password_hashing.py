@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Password check benchmark, bcrypt inline in request threads versus the
+PasswordHasher pool: logins per second, per core, and the latency of
+a cheap route served while the logins run
+$ python benchmarks/password_hashing.py [threads] [seconds]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, jsonify
+from os import cpu_count, path
+from threading import Event
+from time import perf_counter, sleep
+import sys
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from models.user.hasher import (  # noqa: E402
+    PasswordHasher, HasherOverloaded, hashpw, checkpw, BCRYPT_ROUNDS
+)
+
+
+def measure(check, threads: int, seconds: float) -> tuple:
+    """Returns (checks/s, refused) of `threads` checking for `seconds`"""
+    hashed = hashpw('password', BCRYPT_ROUNDS)
+    deadline = perf_counter() + seconds
+
+    def login() -> tuple:
+        done = refused = 0
+        while perf_counter() < deadline:
+            try:
+                check('password', hashed)
+                done += 1
+            except HasherOverloaded:
+                # a refused client retries after a short pause
+                refused += 1
+                sleep(0.01)
+        return done, refused
+
+    started = perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda _: login(), range(threads)))
+    elapsed = perf_counter() - started
+    return (sum(x[0] for x in results) / elapsed,
+            sum(x[1] for x in results))
+
+
+def cheap_latency(check, threads: int, seconds: float) -> tuple:
+    """
+    Returns the (p50, p99, max) milliseconds of a cheap route served
+    while `threads` check passwords for `seconds`
+    """
+    app = Flask(__name__)
+    app.add_url_rule('/status', 'status',
+                     lambda: jsonify({"status": "success", "data": None}))
+    client = app.test_client()
+    hashed = hashpw('password', BCRYPT_ROUNDS)
+    stop = Event()
+
+    def login() -> None:
+        while not stop.is_set():
+            try:
+                check('password', hashed)
+            except HasherOverloaded:
+                sleep(0.01)
+
+    samples = []
+    with ThreadPoolExecutor(threads) as pool:
+        for _ in range(threads):
+            pool.submit(login)
+        deadline = perf_counter() + seconds
+        while perf_counter() < deadline:
+            started = perf_counter()
+            client.get('/status')
+            samples.append((perf_counter() - started) * 1000)
+            sleep(0.005)
+        stop.set()
+    samples.sort()
+    return (samples[len(samples) // 2],
+            samples[min(int(len(samples) * 0.99), len(samples) - 1)],
+            samples[-1])
+
+
+def main(threads: int = 16, seconds: float = 5) -> None:
+    """Prints the throughput of both strategies"""
+    cores = cpu_count() or 1
+    hasher = PasswordHasher()
+    hasher.check('warm', hashpw('up', BCRYPT_ROUNDS))
+    print('rounds {} threads {} cores {} pool workers {}'.format(
+        BCRYPT_ROUNDS, threads, cores, hasher.workers))
+    for name, check in [('inline', checkpw), ('pool', hasher.check)]:
+        rate, refused = measure(check, threads, seconds)
+        print('{:<7} {:9.1f} logins/s {:8.1f} /core  refused {}'.format(
+            name, rate, rate / cores, refused))
+    for name, check in [('inline', checkpw), ('pool', hasher.check)]:
+        p50, p99, worst = cheap_latency(check, threads, seconds)
+        print('{:<7} cheap route p50 {:7.2f}ms p99 {:7.2f}ms '
+              'max {:7.2f}ms'.format(name, p50, p99, worst))
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main(*[float(x) if i else int(x) for i, x in enumerate(sys.argv[1:])])
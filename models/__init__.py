@@ -1,19 +1,17 @@
 #!/usr/bin/env python3
-"""Models"""
-from models.engine.db_storage import DBStorage
-from mail import MailFactory
-from mail.config import SMTPConfig
+"""
+Models. `storage`, `redis` and `mail` are created on first use, so
+importing models neither connects to services nor touches the schema:
+create the tables with `flask --app api.v1.app create-db`.
+"""
+from werkzeug.local import LocalProxy
 from dotenv import load_dotenv
+from functools import wraps
+from threading import Lock
 from os import getenv
-import redis
 
 load_dotenv()
 
-redis = redis.from_url(getenv('REDIS_URL', 'redis://localhost:6379/0'))
-
-storage = DBStorage()
-storage.reload()
-
 # Application's Own Mail Setup
 SMTP_USERNAME = getenv('SMTP_USERNAME')
 SMTP_PASSWORD = getenv('SMTP_PASSWORD')
@@ -21,9 +19,52 @@ SMTP_SERVER = getenv('SMTP_SERVER')
 SMTP_PORT = getenv('SMTP_PORT')
 NOTIFY_EMAIL = getenv('NOTIFY_EMAIL')
 
-config = SMTPConfig(server=SMTP_SERVER, port=SMTP_PORT,
-                    username=SMTP_USERNAME, password=SMTP_PASSWORD)
 
-mail = MailFactory(config=config.to_dict())
+def once(factory):
+    """Returns `factory` running once per process, its result kept"""
+    lock = Lock()
+    result = []
+
+    @wraps(factory)
+    def wrapper():
+        if not result:
+            with lock:
+                if not result:
+                    result.append(factory())
+        return result[0]
+    return wrapper
+
+
+@once
+def get_redis():
+    """Returns the Redis client, connecting on its first command"""
+    from redis import from_url
+    return from_url(getenv('REDIS_URL', 'redis://localhost:6379/0'))
+
+
+@once
+def get_storage():
+    """Returns the storage engine, creating the schema when testing"""
+    from models.engine.db_storage import DBStorage, TEST
+    storage = DBStorage(redis=get_redis())
+    storage.reload()
+    if TEST == 'True':
+        storage.create_all()
+    return storage
+
+
+@once
+def get_mail():
+    """Returns the application's MailFactory"""
+    from mail import MailFactory
+    from mail.config import SMTPConfig
+    config = SMTPConfig(server=SMTP_SERVER, port=SMTP_PORT,
+                        username=SMTP_USERNAME, password=SMTP_PASSWORD)
+    return MailFactory(config=config.to_dict())
+
+
+redis = LocalProxy(get_redis)
+storage = LocalProxy(get_storage)
+mail = LocalProxy(get_mail)
 
 cloud = None
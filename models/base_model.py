@@ -21,20 +21,18 @@ class BaseModel:
     updated_at = Column(DateTime, default=datetime.utcnow,
                         nullable=False)
 
-    def save(self):
-        """Create and save `obj` to storage"""
+    def save(self, commit: bool = None):
+        """
+        Create and save `obj` to storage. Inside a unit of work the
+        commit is deferred unless `commit` is True.
+        """
         self.updated_at = datetime.utcnow()
 
         # Set Index for Objects with index attribute
         if hasattr(self, 'index'):
             if getattr(self, 'index', None) is None:
-                # optimize this to use mysql native count method to improve performance
-                objs = list(models.storage.all(self.__class__).values())
-                if len(objs) == 0:
-                    setattr(self, 'index', 1)
-                else:
-                    sorted_objs = sorted(objs, key=lambda x: x.index)
-                    setattr(self, 'index', sorted_objs[-1].index + 1)
+                setattr(self, 'index', models.storage.next_index(
+                    self.__class__))
 
         # Set custome serial number
         if all([
@@ -46,12 +44,14 @@ class BaseModel:
                 str(self.index).zfill(self.Z_FILL)
 
         models.storage.new(self)
-        models.storage.save()
+        models.storage.save(commit=commit)
+        models.storage.evict(self)
 
-    def delete(self):
+    def delete(self, commit: bool = None):
         """Delete `obj` from storgae"""
         models.storage.delete(self)
-        models.storage.save()
+        models.storage.save(commit=commit)
+        models.storage.evict(self)
 
     def to_dict(self, detailed=False) -> Dict[str, str]:
         """Returns a dictionary representation of an obj"""
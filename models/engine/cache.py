@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Caches used by the storage engine"""
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic, sleep
+from random import uniform
+from typing import Any, Callable, Hashable
+from uuid import uuid4
+from redis.exceptions import RedisError
+import json
+
+# deletes a lock only while it still holds the caller's token
+RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LRUCache:
+    """A bounded, thread-safe LRU cache with per-entry TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30) -> None:
+        """Initializes LRUCache instance"""
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.__data = OrderedDict()
+        self.__lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @property
+    def enabled(self) -> bool:
+        """Returns True if the cache can hold any entry"""
+        return self.maxsize > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value of `key`, or `default` if missing/expired"""
+        with self.__lock:
+            item = self.__data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= monotonic():
+                del self.__data[key]
+                return default
+            self.__data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """Stores `value` under `key`, evicting the least recently used"""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self.__lock:
+            self.__data[key] = (value, monotonic() + ttl)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Removes `key` and returns its value"""
+        with self.__lock:
+            item = self.__data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        """Removes every entry"""
+        with self.__lock:
+            self.__data.clear()
+
+
+class ReadThroughCache:
+    """
+    Redis-backed read-through cache of serialized objects. Every
+    variant (e.g. detailed or not) of one object lives in one hash so
+    a single DEL invalidates them all. Concurrent misses for one key
+    run the loader once per process, and once across processes while
+    the Redis lock is held. Waiters stop as soon as the lock is gone
+    and only its owner deletes it.
+    """
+
+    key = 'read_cache:{}:{}'
+    lock_key = '{}:lock:{}'
+
+    def __init__(self, redis, ttl: float = 300, jitter: float = 0.1,
+                 lock_ttl: float = 5) -> None:
+        """Initializes ReadThroughCache instance"""
+        self.redis = redis
+        self.ttl = float(ttl)
+        self.jitter = float(jitter)
+        self.lock_ttl = float(lock_ttl)
+        self.__release = None
+        if redis is not None:
+            self.__release = redis.register_script(RELEASE_LOCK)
+        self.__flights = {}
+        self.__lock = RLock()
+
+    @property
+    def enabled(self) -> bool:
+        """Returns True if entries are cached at all"""
+        return self.redis is not None and self.ttl > 0
+
+    def __read(self, key: str, variant: str) -> Any:
+        """Returns the cached value, or None"""
+        raw = self.redis.hget(key, variant)
+        return None if raw is None else json.loads(raw)
+
+    def get_or_load(self, cls, id: str, variant: str,
+                    loader: Callable[[], Any]) -> Any:
+        """Returns the cached `variant` of (`cls`, `id`), else loader()"""
+        if not self.enabled:
+            return loader()
+        key = self.key.format(cls.__tablename__, id)
+        try:
+            value = self.__read(key, variant)
+            if value is not None:
+                return value
+        except RedisError:
+            return loader()
+
+        flight = self.__join((key, variant))
+        try:
+            with flight[0]:
+                return self.__load(key, variant, loader)
+        finally:
+            self.__leave((key, variant), flight)
+
+    def __load(self, key: str, variant: str,
+               loader: Callable[[], Any]) -> Any:
+        """Loads and stores a missing value, once across processes"""
+        token = uuid4().hex
+        try:
+            # a concurrent caller may have filled it already
+            value = self.__read(key, variant)
+            if value is not None:
+                return value
+            lock = self.lock_key.format(key, variant)
+            if not self.redis.set(lock, token, nx=True,
+                                  ex=int(self.lock_ttl)):
+                token = None
+                deadline = monotonic() + self.lock_ttl
+                while monotonic() < deadline:
+                    sleep(0.05)
+                    pipe = self.redis.pipeline(transaction=False)
+                    pipe.hget(key, variant)
+                    pipe.exists(lock)
+                    raw, locked = pipe.execute()
+                    if raw is not None:
+                        return json.loads(raw)
+                    # released without a value, e.g. the row is gone
+                    if not locked:
+                        break
+        except RedisError:
+            return loader()
+
+        value = loader()
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            if value is not None:
+                ttl = self.ttl * uniform(1 - self.jitter, 1 + self.jitter)
+                pipe.hset(key, variant, json.dumps(value))
+                pipe.expire(key, max(int(ttl), 1))
+            if token is not None:
+                self.__release(keys=[lock], args=[token], client=pipe)
+            pipe.execute()
+        except RedisError:
+            pass
+        return value
+
+    def __join(self, key: tuple) -> list:
+        """Returns the in-process flight of `key`, creating it"""
+        with self.__lock:
+            flight = self.__flights.setdefault(key, [RLock(), 0])
+            flight[1] += 1
+            return flight
+
+    def __leave(self, key: tuple, flight: list) -> None:
+        """Drops the flight of `key` once its last caller is done"""
+        with self.__lock:
+            flight[1] -= 1
+            if flight[1] == 0:
+                self.__flights.pop(key, None)
+
+    def invalidate(self, cls, id: str) -> None:
+        """Drops every cached variant of (`cls`, `id`)"""
+        if not self.enabled:
+            return
+        try:
+            self.redis.delete(self.key.format(cls.__tablename__, id))
+        except RedisError:
+            pass
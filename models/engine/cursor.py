@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Opaque cursors for keyset pagination"""
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+import binascii
+import json
+
+
+def encode_cursor(obj, direction: str = 'next',
+                  key: str = 'created_at') -> str:
+    """Returns an opaque cursor pointing at `obj`'s (`key`, id)"""
+    value = getattr(obj, key)
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    payload = json.dumps({
+        'k': key,
+        'v': value,
+        'i': obj.id,
+        'd': direction,
+    }, separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor: str, key: str = 'created_at') -> tuple:
+    """Returns (value, id, direction) of a cursor encoded on `key`"""
+    try:
+        payload = json.loads(urlsafe_b64decode(cursor.encode('utf-8')))
+        if payload['k'] != key:
+            raise ValueError('cursor was built for ' + str(payload['k']))
+        value = payload['v']
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['dt'])
+        direction = payload.get('d', 'next')
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return value, str(payload['i']), direction
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise ValueError('Invalid cursor: ' + str(exc))
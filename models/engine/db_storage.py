@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 """SQLAlchemy Storage Engine"""
-from sqlalchemy import extract
 from typing import List
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from math import ceil
-from typing import Dict, Callable
+from typing import Dict, Callable, Iterator
 from models.user import User
 from models.base_model import Base
-from sqlalchemy import create_engine, func, and_
-from sqlalchemy.orm import scoped_session, sessionmaker
+from models.engine.cache import LRUCache, ReadThroughCache
+from models.engine.sequence import SequenceAllocator
+from models.engine import rollup
+from models.engine.cursor import encode_cursor, decode_cursor
+from models.engine.query import ListQuery
+from models.engine.serializer import Serializer
+from models.engine.router import ReplicaRouter, RoutingSession, read_only
+from models.engine.profiler import profiler, SQL_PROFILE
+from models.engine.write_behind import (
+    WriteBehindBuffer, WRITE_BEHIND_INTERVAL
+)
+from contextlib import contextmanager
+from sqlalchemy import create_engine, func, or_, text, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import (
+    scoped_session, sessionmaker, make_transient_to_detached
+)
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
 from os import getenv
 from dotenv import load_dotenv
 import uuid
@@ -17,6 +35,27 @@ load_dotenv()
 
 PAGINATION = int(getenv('PAGINATION', 25))
 
+# per-process identity cache, disabled when IDENTITY_CACHE_SIZE is 0
+IDENTITY_CACHE_SIZE = int(getenv('IDENTITY_CACHE_SIZE', 0))
+IDENTITY_CACHE_TTL = float(getenv('IDENTITY_CACHE_TTL', 30))
+
+# per-process cache of a few columns per row, e.g. auth principals;
+# other workers see a change after at most SNAPSHOT_CACHE_TTL seconds
+SNAPSHOT_CACHE_SIZE = int(getenv('SNAPSHOT_CACHE_SIZE', 1024))
+SNAPSHOT_CACHE_TTL = float(getenv('SNAPSHOT_CACHE_TTL', 5))
+
+# rows fetched per round trip when streaming
+STREAM_CHUNK_SIZE = int(getenv('STREAM_CHUNK_SIZE', 500))
+
+# rows written per transaction by bulk_save()
+BULK_CHUNK_SIZE = int(getenv('BULK_CHUNK_SIZE', 1000))
+
+# seconds serialized objects stay in the Redis read cache, 0 disables it
+READ_CACHE_TTL = float(getenv('READ_CACHE_TTL', 0))
+
+# seconds a table's total count is reused by paginated()
+COUNT_CACHE_TTL = float(getenv('COUNT_CACHE_TTL', 5))
+
 
 # grouping of models' classes
 classes = [
@@ -28,6 +67,9 @@ DB_HOST = getenv('DB_HOST')
 DB_NAME = getenv('DB_NAME')
 DB_ENGINE = getenv('DB_ENGINE')
 
+# comma separated SQLAlchemy URLs of read replicas
+DB_REPLICA_URLS = getenv('DB_REPLICA_URLS', '')
+
 # check if the running instance is a test environment
 TEST = getenv('TEST')
 if TEST == 'True':
@@ -56,35 +98,292 @@ class DBStorage:
     __engine = None
     __session = None
 
-    def __init__(self):
+    def __init__(self, redis=None, replicas: List[str] = None):
         """DBStorage class constructor"""
         self.__engine = engine
+        if replicas is None:
+            replicas = [url for url in DB_REPLICA_URLS.split(',') if url]
+        self.__router = None
+        if len(replicas) != 0:
+            self.__router = ReplicaRouter([
+                create_engine(url, pool_pre_ping=True, pool_recycle=3600)
+                for url in replicas
+            ])
+        if SQL_PROFILE:
+            profiler.attach(self.__engine)
+            for replica in getattr(self.__router, 'engines', []):
+                profiler.attach(replica)
+        self.__sequences = SequenceAllocator(engine, redis=redis)
+        self.__write_behind = WriteBehindBuffer(engine, classes, redis=redis)
+        self.__identity = LRUCache(maxsize=IDENTITY_CACHE_SIZE,
+                                   ttl=IDENTITY_CACHE_TTL)
+        self.__counts = LRUCache(maxsize=256, ttl=COUNT_CACHE_TTL)
+        self.__versions = LRUCache(maxsize=256, ttl=COUNT_CACHE_TTL)
+        self.__snapshots = LRUCache(maxsize=SNAPSHOT_CACHE_SIZE,
+                                    ttl=SNAPSHOT_CACHE_TTL)
+        self.__read_cache = ReadThroughCache(redis, ttl=READ_CACHE_TTL)
+
+    def create_all(self):
+        """Creates the missing tables and indexes of every model"""
+        Base.metadata.create_all(self.__engine)
 
     def reload(self):
         """(Re)load data from MySQL database"""
-        Base.metadata.create_all(self.__engine)
-        factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        factory = sessionmaker(bind=self.__engine, expire_on_commit=False,
+                               class_=RoutingSession, router=self.__router)
         self.__session = scoped_session(factory)
 
+    @contextmanager
+    def reading(self):
+        """Routes the queries run inside the block to a read replica"""
+        info = self.__session.info
+        info['reading'] = info.get('reading', 0) + 1
+        try:
+            yield
+        finally:
+            info['reading'] -= 1
+
+    def begin_unit(self):
+        """
+        Starts a unit of work: until `end_unit`, save() only flushes
+        and the changes are committed once by `end_unit`
+        """
+        self.__session.info['unit_of_work'] = True
+
+    def end_unit(self, commit: bool = True):
+        """Commits (or rolls back) the changes of the unit of work"""
+        info = self.__session.info
+        if not info.pop('unit_of_work', False):
+            return
+        if commit is False:
+            self.rollback()
+            return
+        if not any([info.get('sticky'), self.__session.new,
+                    self.__session.dirty, self.__session.deleted]):
+            # read-only unit, nothing to commit
+            return
+        try:
+            self.__commit()
+        except SQLAlchemyError:
+            self.rollback()
+            raise
+
     def new(self, obj):
         """Add `obj` to the current database session"""
+        self.__session.info['sticky'] = True
         self.__session.add(obj)
 
-    def save(self):
-        """Save/commit all changes of the current db session"""
+    def save(self, commit: bool = None):
+        """
+        Save/commit all changes of the current db session. Inside a
+        unit of work the changes are only flushed, unless `commit`
+        is True.
+        """
+        self.__session.info['sticky'] = True
+        if self.__session.info.get('unit_of_work') and commit is not True:
+            self.__session.flush()
+            return
+        self.__commit()
+
+    def __commit(self):
+        """Commits the session and evicts what it wrote from caches"""
+        written = [(obj.__class__, obj.id) for obj in
+                   list(self.__session.new) + list(self.__session.dirty) +
+                   list(self.__session.deleted)]
+        written.extend(self.__session.info.pop('written', []))
         self.__session.commit()
+        for cls, id in written:
+            self.__evict_key(cls, id)
+        if written:
+            self.__versions.clear()
+
+    def __evict_key(self, cls, id: str):
+        """Drops the row `id` of `cls` from every cache"""
+        self.__identity.pop((cls, id))
+        self.__snapshots.pop((cls, id))
+        self.__read_cache.invalidate(cls, id)
 
     def delete(self, obj=None):
         """delete `obj` from database"""
         if obj is not None:
+            self.__session.info['sticky'] = True
             self.__session.delete(obj)
 
+    def bulk_save(self, cls, rows: List[Dict[str, any]],
+                  upsert: List[str] = None,
+                  chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, any]:
+        """
+        Inserts `rows` (dicts of column values) of `cls` with one
+        executemany statement and one commit per `chunk_size` rows.
+        With `upsert` (the conflicting unique columns), existing rows
+        are updated instead. A failing chunk is retried row by row so
+        that only the faulty rows are reported.
+        Returns {"saved": int, "errors": [{"row": int, "message": str}]}
+        """
+        report = {"saved": 0, "errors": []}
+        if cls not in classes:
+            return None
+
+        table = cls.__table__
+        now = datetime.utcnow()
+        for row in rows:
+            row.setdefault('created_at', now)
+            row['updated_at'] = now
+            if 'index' in table.columns and row.get('index') is None:
+                row['index'] = self.next_index(cls)
+                if all([hasattr(cls, 'serial_number'),
+                        hasattr(cls, 'Z_FILL'), hasattr(cls, 'SN_PREFIX')]):
+                    row['serial_number'] = cls.SN_PREFIX + \
+                        str(row['index']).zfill(cls.Z_FILL)
+
+        statement = insert(table)
+        if upsert:
+            keep = set(upsert) | {'id', 'created_at', 'index',
+                                  'serial_number'}
+            if self.__engine.dialect.name == 'mysql':
+                statement = mysql_insert(table)
+                statement = statement.on_duplicate_key_update({
+                    c.name: statement.inserted[c.name]
+                    for c in table.columns if c.name not in keep})
+            else:
+                statement = sqlite_insert(table)
+                statement = statement.on_conflict_do_update(
+                    index_elements=upsert, set_={
+                        c.name: statement.excluded[c.name]
+                        for c in table.columns if c.name not in keep})
+
+        self.__session.info['sticky'] = True
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            updated = self.__upserted(cls, chunk, upsert)
+            try:
+                self.__record_rollup(cls, chunk, upsert)
+                self.__session.execute(statement, chunk)
+                self.__session.commit()
+                report['saved'] += len(chunk)
+                self.__evict_updated(cls, updated)
+                self.__versions.clear()
+                continue
+            except SQLAlchemyError:
+                self.__session.rollback()
+
+            for number, row in enumerate(chunk, start):
+                try:
+                    self.__record_rollup(cls, [row], upsert)
+                    self.__session.execute(statement, [row])
+                    self.__session.commit()
+                    report['saved'] += 1
+                    self.__evict_updated(cls, self.__upserted(
+                        cls, [row], upsert))
+                    self.__versions.clear()
+                except SQLAlchemyError as exc:
+                    self.__session.rollback()
+                    report['errors'].append({
+                        "row": number,
+                        "message": str(getattr(exc, 'orig', None) or exc)
+                    })
+        return report
+
+    def __upserted(self, cls, rows: List[Dict[str, any]],
+                   upsert: List[str] = None) -> List[str]:
+        """
+        Returns the ids of the existing rows `rows` will update. The
+        CASE_INSENSITIVE upsert key of each row is set to the stored
+        value, so the upsert conflicts with it instead of adding a
+        case variant.
+        """
+        if not upsert:
+            return []
+        key = upsert[0]
+        column = getattr(cls, key)
+        insensitive = key in getattr(cls, 'CASE_INSENSITIVE', [])
+        values = [row[key] for row in rows if row.get(key) is not None]
+        if insensitive:
+            values = [value.lower() for value in values]
+            column = func.lower(column)
+        stored = {}
+        for id, value in self.__session.query(
+                cls.id, getattr(cls, key)).filter(column.in_(values)):
+            stored[value.lower() if insensitive else value] = (id, value)
+
+        ids = []
+        for row in rows:
+            value = row.get(key)
+            if insensitive and isinstance(value, str):
+                value = value.lower()
+            if value in stored:
+                ids.append(stored[value][0])
+                row[key] = stored[value][1]
+        return ids
+
+    def __evict_updated(self, cls, ids: List[str]):
+        """Drops rows updated behind the ORM from caches and session"""
+        for id in ids:
+            self.__evict_key(cls, id)
+            obj = self.__session.identity_map.get(identity_key(cls, id))
+            if obj is not None:
+                self.__session.expire(obj)
+
+    def __record_rollup(self, cls, rows: List[Dict[str, any]],
+                        upsert: List[str] = None) -> None:
+        """Counts the `rows` bulk_save is about to insert"""
+        if getattr(cls, 'ROLLUP', None) is None:
+            return
+        if upsert:
+            # rows matching an existing one are updates, not inserts
+            key = upsert[0]
+            taken = self.existing(cls, key, [row[key] for row in rows])
+            if key in getattr(cls, 'CASE_INSENSITIVE', []):
+                rows = [r for r in rows if r[key].lower() not in taken]
+            else:
+                rows = [r for r in rows if r[key] not in taken]
+        rollup.record(self.__session.connection(), cls, rows)
+
+    def touch(self, obj, attr: str, value=None,
+              window: float = WRITE_BEHIND_INTERVAL) -> None:
+        """
+        Sets `obj.attr` to `value` (default: now) without making the
+        session dirty. The value is written later by the write-behind
+        buffer, and only if the stored one is older than `window`
+        seconds.
+        """
+        value = value or datetime.utcnow()
+        current = getattr(obj, attr, None)
+        # a snapshot (e.g. an auth Principal) names its mapped class
+        cls = getattr(obj, 'model', obj.__class__)
+        if cls is obj.__class__:
+            set_committed_value(obj, attr, value)
+        else:
+            obj.set_committed(attr, value)
+        cached = self.__snapshots.get((cls, obj.id))
+        if cached is not None and attr in cached:
+            cached[attr] = value
+        if isinstance(current, datetime) and \
+                (value - current).total_seconds() < window:
+            return
+        self.__write_behind.record(cls, obj.id, attr, value)
+
+    def flush_write_behind(self) -> int:
+        """Writes the buffered touch() updates now"""
+        return self.__write_behind.flush()
+
+    def next_index(self, cls) -> int:
+        """
+        Returns the next unique `index` value for `cls`. On SQLite it
+        is reserved through the session's connection: a transaction of
+        its own would wait on the database lock the session may hold.
+        """
+        if self.__engine.dialect.name == 'sqlite':
+            return self.__sequences.next(cls, self.__session.connection())
+        return self.__sequences.next(cls)
+
     def rollback(self):
         """rolls back the current Sqlalchemy session
         after a failed flush occured
         just for testing purposes"""
         self.__session.rollback()
 
+    @read_only
     def all(self, cls=None):
         """
         query-> SELECT * FROM cls.__tablename__
@@ -109,6 +408,7 @@ class DBStorage:
         """close the current db session"""
         self.__session.remove()
 
+    @read_only
     def get(self, cls, id=None, attr=None):
         """
         Returns a `obj` of `cls` with a matching `id`,
@@ -124,37 +424,147 @@ class DBStorage:
 
         if cls not in classes:
             return None
+        key = identity_key(cls, id)
         if attr is not None:
-            obj = self.all(cls).get(cls.__name__ + '.' + id, None)
+            # single column lookup when nothing is held in memory
+            if all([attr in cls.__mapper__.column_attrs,
+                    key not in self.__session.identity_map,
+                    self.__identity.get((cls, id)) is None]):
+                return self.__session.query(getattr(cls, attr)).filter(
+                    cls.id == id).scalar()
+            obj = self.get(cls, id)
             if obj is None:
                 return obj
             return getattr(obj, attr, None)
-        return self.all(cls).get(cls.__name__ + '.' + id, None)
 
+        obj = self.__session.identity_map.get(key)
+        if obj is not None:
+            return obj
+
+        cached = self.__identity.get((cls, id))
+        if cached is not None:
+            # rebuild the object from its snapshot, no SQL
+            obj = cls.__mapper__.class_manager.new_instance()
+            for name, value in cached.items():
+                setattr(obj, name, value)
+            make_transient_to_detached(obj)
+            return self.__session.merge(obj, load=False)
+
+        obj = self.__session.get(cls, id)
+        if obj is not None and self.__identity.enabled:
+            self.__identity.set((cls, id), {
+                prop.key: getattr(obj, prop.key)
+                for prop in cls.__mapper__.column_attrs
+            })
+        return obj
+
+    @read_only
+    def snapshot(self, cls, id: str, attrs: List[str]) -> Dict[str, any]:
+        """
+        Returns {attr: value} of `attrs` of the `cls` row with a
+        matching `id`, or None if not exists. The values are read with
+        one narrow SELECT and kept for SNAPSHOT_CACHE_TTL seconds, or
+        until the row is written by this process.
+        """
+        if id is None or cls not in classes:
+            return None
+        if isinstance(id, uuid.UUID):
+            id = str(id)
+        cached = self.__snapshots.get((cls, id))
+        if cached is not None and all(attr in cached for attr in attrs):
+            return {attr: cached[attr] for attr in attrs}
+
+        obj = self.__session.identity_map.get(identity_key(cls, id))
+        if obj is not None:
+            values = {attr: getattr(obj, attr) for attr in attrs}
+        else:
+            row = self.__session.query(
+                *[getattr(cls, attr) for attr in attrs]
+            ).filter(cls.id == id).first()
+            if row is None:
+                return None
+            values = dict(zip(attrs, row))
+        self.__snapshots.set((cls, id), dict(values))
+        return values
+
+    def serialized(self, cls, id: str, detailed: bool = False,
+                   obj=None) -> Dict[str, any]:
+        """
+        Returns `to_dict(detailed)` of the `cls` with a matching `id`,
+        or None if not exists, through the Redis read cache.
+        An already loaded `obj` saves the lookup on a miss.
+        """
+        def load():
+            if obj is not None:
+                return obj.to_dict(detailed=detailed)
+            serializer = Serializer.for_class(cls, detailed)
+            with self.reading():
+                row = self.__session.query(*serializer.columns()).filter(
+                    cls.id == id).first()
+            return None if row is None else serializer(row)
+
+        if isinstance(id, uuid.UUID):
+            id = str(id)
+        if id is None or cls not in classes:
+            return None
+        return self.__read_cache.get_or_load(
+            cls, id, 'detailed' if detailed else 'basic', load)
+
+    def evict(self, obj=None):
+        """Drops `obj` from the in-process caches, or every entry if None"""
+        if obj is None:
+            self.__identity.clear()
+            self.__snapshots.clear()
+            return
+        self.__identity.pop((obj.__class__, obj.id))
+        self.__snapshots.pop((obj.__class__, obj.id))
+        self.__read_cache.invalidate(obj.__class__, obj.id)
+        if self.__session.info.get('unit_of_work'):
+            # evict again once the unit of work commits
+            self.__session.info.setdefault('written', set()).add(
+                (obj.__class__, obj.id))
+
+    @read_only
     def match(self, cls, all=False, **kwargs):
         """
-        Returns a `obj` of `cls` with a matching list
-        of attributes
+        Returns a `obj` of `cls` matching any of the given attributes,
+        or a list of all matching `obj` when `all` is True.
+        Attributes declared in `cls.CASE_INSENSITIVE` are compared
+        lowercased, which is served by their functional index.
         """
-        from sqlalchemy import func
         if cls not in classes or len(kwargs) == 0:
             return None
-        results = []
+
+        case_insensitive = getattr(cls, 'CASE_INSENSITIVE', [])
+        clauses = []
         for key, value in kwargs.items():
-            value = value if not isinstance(value, str) else value.lower()
-            if all is False:
-                obj = self.__session.query(cls).filter(
-                    func.lower(getattr(cls, key)) == value).first()
-                if obj is not None:
-                    return obj
+            column = getattr(cls, key)
+            if key in case_insensitive and isinstance(value, str):
+                clauses.append(func.lower(column) == value.lower())
             else:
-                obj = self.__session.query(cls).filter(
-                    func.lower(getattr(cls, key)) == value).all()
-                if obj is not None:
-                    results.extend(obj)
-                    obj = results[:]
-        return obj
+                clauses.append(column == value)
+
+        query = self.__session.query(cls).filter(or_(*clauses))
+        if all is False:
+            return query.first()
+        return query.all()
+
+    @read_only
+    def existing(self, cls, attr: str, values: List[any]) -> set:
+        """
+        Returns the subset of `values` already stored as `cls.attr`,
+        lowercased when `attr` is declared case-insensitive
+        """
+        if cls not in classes or len(values) == 0:
+            return set()
+        column = getattr(cls, attr)
+        if attr in getattr(cls, 'CASE_INSENSITIVE', []):
+            values = [value.lower() for value in values]
+            column = func.lower(column)
+        rows = self.__session.query(column).filter(column.in_(values))
+        return set(row[0] for row in rows)
 
+    @read_only
     def count(self, cls, **kwargs) -> int:
         """Returns a count of an object with a matching list of attributes"""
         if cls not in classes:
@@ -167,12 +577,80 @@ class DBStorage:
         ).select_from(cls).filter_by(**kwargs)
         return result.scalar()
 
+    @read_only
+    def total(self, cls, exact: bool = True,
+              query: ListQuery = None) -> int:
+        """
+        Returns the number of `cls` rows matching `query`, reused for
+        COUNT_CACHE_TTL seconds. When `exact` is False on MySQL and no
+        filter applies, the table statistics estimate is returned
+        instead of running COUNT(*).
+        """
+        query = query or ListQuery(cls)
+        key = (query.signature, exact)
+        result = self.__counts.get(key)
+        if result is not None:
+            return result
+
+        if all([exact is False, not query.filtered,
+                self.__engine.dialect.name == 'mysql']):
+            result = self.__session.execute(text(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = :name'
+            ), {'name': cls.__tablename__}).scalar()
+        if result is None:
+            result = query.apply(
+                self.__session.query(func.count()).select_from(cls)
+            ).scalar()
+        self.__counts.set(key, int(result))
+        return int(result)
+
+    @read_only
+    def version(self, cls, query: ListQuery = None) -> tuple:
+        """
+        Returns (count, max(updated_at)) of the `cls` rows matching
+        `query`, which changes whenever a matching row is created,
+        updated or deleted. Reused for COUNT_CACHE_TTL seconds, or
+        until this process commits a write.
+        """
+        if cls not in classes:
+            return None
+        query = query or ListQuery(cls)
+        result = self.__versions.get(query.signature)
+        if result is not None:
+            return result
+        result = tuple(query.apply(self.__session.query(
+            func.count(), func.max(cls.updated_at)).select_from(cls)).one())
+        self.__versions.set(query.signature, result)
+        return result
+
+    @read_only
     def paginated(self, cls, page=1, func: Callable = None,
-                  size=None) -> Dict[str, any]:
-        """Returned a paginated data of the matching class instances"""
+                  size=None, cursor: str = None, count=True,
+                  query: ListQuery = None,
+                  serializer: Serializer = None) -> Dict[str, any]:
+        """
+        Returned a paginated data of the matching class instances.
+        A `query` (see ListQuery) supplies filters, ordering and the
+        page window in place of `page`, `size`, `cursor` and `count`.
+        When `cursor` is not None (an empty string starts from the
+        first item) keyset pagination is used and opaque `next`/`prev`
+        cursors are returned instead of `page`.
+        `count` selects how `total_items` is computed: True for an exact
+        count, 'estimate' for an estimated count, False to skip it.
+        With a `serializer`, only its columns are selected and the rows
+        are serialized by it instead of `func`.
+        """
         if cls not in classes:
             return None
 
+        if serializer is not None:
+            func = serializer
+        if query is None:
+            query = ListQuery(cls, page=page, size=size, cursor=cursor,
+                              count=count)
+        page, size = query.page, query.size
+
         # assert size is integer
         if size is not None:
             try:
@@ -181,27 +659,42 @@ class DBStorage:
                 size = PAGINATION
         else:
             size = PAGINATION
+        size = PAGINATION if size <= 0 else size
+
+        total_items = None
+        if query.count is not False:
+            total_items = self.total(cls, exact=query.count != 'estimate',
+                                     query=query)
 
-        total_items = self.count(cls)
-        total_pages = ceil(total_items / size)
+        if query.cursor is not None:
+            data = self.__seek(query, size, serializer)
+            if func is not None:
+                data['items'] = [func(x) for x in data['items']]
+            data.update({"total_items": total_items})
+            return data
+
+        total_pages = None
+        if total_items is not None:
+            total_pages = ceil(total_items / size)
+        rows = query.apply(self.__session.query(
+            *self.__entities(query, serializer))).order_by(*query.order_by())
         try:
             page = page or 1
             page = 1 if int(page) <= 0 else int(page)
         except ValueError:
             if page == 'all':
-                items = self.all(cls).values()
+                items = rows.all()
                 return {
                     "page": 1,
-                    "page_size": total_items,
-                    "total_items": total_items,
+                    "page_size": len(items),
+                    "total_items": len(items),
                     "total_pages": 1,
                     "items": items if func is None else [func(x) for x in items]
                 }
             else:
                 page = 1
 
-        items = self.__session.query(cls).offset(
-            (page - 1) * size).limit(size).all()
+        items = rows.offset((page - 1) * size).limit(size).all()
         page_size = len(items)
 
         return {
@@ -212,23 +705,108 @@ class DBStorage:
             "items": items if func is None else [func(x) for x in items]
         }
 
+    def stream(self, cls, query: ListQuery = None,
+               chunk_size: int = STREAM_CHUNK_SIZE,
+               serializer: Serializer = None) -> Iterator[any]:
+        """
+        Yields every `cls` instance matching `query`, fetched from a
+        server-side cursor `chunk_size` rows at a time, or the rows
+        serialized by `serializer`
+        """
+        if cls not in classes:
+            return
+        query = query or ListQuery(cls)
+        with self.reading():
+            rows = query.apply(self.__session.query(
+                *self.__entities(query, serializer))).order_by(
+                *query.order_by()).execution_options(stream_results=True)
+            for row in rows.yield_per(chunk_size):
+                yield row if serializer is None else serializer(row)
+
+    @staticmethod
+    def __entities(query: ListQuery, serializer: Serializer = None) -> list:
+        """Returns what a list query selects: objects or bare columns"""
+        if serializer is None:
+            return [query.cls]
+        return serializer.columns(extra=[query.sort, 'id'])
+
+    def __seek(self, query: ListQuery, size: int,
+               serializer: Serializer = None) -> Dict[str, any]:
+        """Returns a page of `query` rows after/before its cursor"""
+        rows = query.apply(self.__session.query(
+            *self.__entities(query, serializer)))
+        cursor, direction = query.cursor, 'next'
+        if cursor:
+            value, id, direction = decode_cursor(cursor, key=query.sort)
+            rows = rows.filter(query.seek(
+                value, id, reverse=direction == 'prev'))
+        rows = rows.order_by(*query.order_by(reverse=direction == 'prev'))
+
+        # one extra row tells whether there is a further page
+        items = rows.limit(size + 1).all()
+        more = len(items) > size
+        items = items[:size]
+        if direction == 'prev':
+            items.reverse()
+
+        has_next = more if direction == 'next' else True
+        has_prev = bool(cursor) if direction == 'next' else more
+        return {
+            "page_size": len(items),
+            "next": encode_cursor(items[-1], 'next', key=query.sort)
+            if items and has_next else None,
+            "prev": encode_cursor(items[0], 'prev', key=query.sort)
+            if items and has_prev else None,
+            "items": items,
+        }
+
+    @read_only
     def filter_by_date(self, cls, date_from: datetime,
                        date_to: datetime) -> List[any]:
-        """Returns a filtered list of cls instance from storage"""
+        """
+        Returns a filtered list of cls instance from storage created
+        from the day of `date_from` through the day of `date_to`
+        """
         if not all([cls in classes, isinstance(date_from, datetime),
                     isinstance(date_to, datetime)]):
             return []
+        start = datetime.combine(date_from.date(), time.min)
+        end = datetime.combine(date_to.date(), time.min) + timedelta(days=1)
         result = self.__session.query(cls).filter(
-            cls.created_at.between(date_from.date(), date_to.date())
+            cls.created_at >= start, cls.created_at < end
         ).all()
         return result
 
+    @read_only
     def filter_by_month(self, cls, date: datetime) -> List[any]:
         """Returns a filtered list of cls instance from storage"""
         if not all([cls in classes, isinstance(date, datetime)]):
             return []
+        start = datetime(date.year, date.month, 1)
+        end = datetime(date.year + date.month // 12, date.month % 12 + 1, 1)
         result = self.__session.query(cls).filter(
-            and_(extract('month', cls.created_at) == date.month,
-                 extract('year', cls.created_at) == date.year)
+            cls.created_at >= start, cls.created_at < end
         ).all()
         return result
+
+    @read_only
+    def rollup(self, cls, period: str = 'day', date_from=None,
+               date_to=None, dimension: str = '',
+               value=None) -> Dict[str, int]:
+        """
+        Returns {bucket: count} of `cls` rows created per `period`
+        ('day' or 'month'), optionally for one `dimension` `value`
+        (e.g. dimension='role', value=Role.user), read from the
+        precomputed rollup table
+        """
+        if cls not in classes:
+            return None
+        return rollup.read(self.__session.connection(), cls,
+                           period=period, date_from=date_from,
+                           date_to=date_to, dimension=dimension,
+                           value=value)
+
+    def rebuild_rollup(self, cls) -> None:
+        """Recomputes the rollup of `cls`, e.g. after a first deploy"""
+        with self.__engine.begin() as connection:
+            rollup.rebuild(connection, cls)
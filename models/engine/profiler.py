@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Per-request SQL statement profiling"""
+from sqlalchemy import event
+from contextvars import ContextVar
+from collections import Counter, deque
+from threading import Lock
+from time import perf_counter
+from typing import Dict
+from os import getenv
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+
+SQL_PROFILE = getenv('SQL_PROFILE') == 'True'
+# statements slower than SQL_SLOW_MS milliseconds are logged
+SQL_SLOW_MS = float(getenv('SQL_SLOW_MS', 200))
+# identical statements repeated this often in a request are flagged N+1
+SQL_REPEAT_THRESHOLD = int(getenv('SQL_REPEAT_THRESHOLD', 5))
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements recorded for one unit of work, e.g. a request"""
+
+    def __init__(self, label: str = None) -> None:
+        """Initializes QueryStats instance"""
+        self.label = label
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest = []
+        self.statements = Counter()
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        """Records one executed statement"""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+        self.slowest.append((elapsed_ms, statement))
+        self.slowest = sorted(self.slowest, reverse=True)[:5]
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Returns statements run at least `threshold` times"""
+        return {sql: n for sql, n in self.statements.items()
+                if n >= threshold}
+
+    def to_dict(self, threshold: int = SQL_REPEAT_THRESHOLD):
+        """Returns a dictionary summary of the recorded statements"""
+        return {
+            "label": self.label,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "slowest": [{"ms": round(ms, 3), "statement": sql}
+                        for ms, sql in self.slowest],
+            "repeated": self.repeated(threshold),
+        }
+
+
+class QueryProfiler:
+    """Engine event hooks feeding the QueryStats of the current context"""
+
+    def __init__(self, slow_ms: float = SQL_SLOW_MS,
+                 threshold: int = SQL_REPEAT_THRESHOLD,
+                 keep: int = 50) -> None:
+        """Initializes QueryProfiler instance"""
+        self.slow_ms = slow_ms
+        self.threshold = threshold
+        self.recent = deque(maxlen=keep)
+        self.__current = ContextVar('query_stats', default=None)
+        self.__lock = Lock()
+
+    def attach(self, engine) -> None:
+        """Listens to the statements executed on `engine`"""
+        event.listen(engine, 'before_cursor_execute', self.before_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_execute)
+
+    def before_execute(self, conn, cursor, statement, parameters,
+                       context, executemany) -> None:
+        """Notes the start time of a statement"""
+        conn.info.setdefault('query_started', []).append(perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters,
+                      context, executemany) -> None:
+        """Records a statement in the current stats, logs it when slow"""
+        started = conn.info['query_started'].pop()
+        stats = self.__current.get()
+        if stats is None:
+            return
+        elapsed_ms = (perf_counter() - started) * 1000
+        stats.add(statement, elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            logger.warning('Slow query %.1fms on %s: %s',
+                           elapsed_ms, stats.label, statement)
+
+    def start(self, label: str = None) -> QueryStats:
+        """Starts recording statements of the current context"""
+        stats = QueryStats(label)
+        self.__current.set(stats)
+        return stats
+
+    @property
+    def current(self) -> QueryStats:
+        """Returns the stats being recorded, or None"""
+        return self.__current.get()
+
+    def stop(self) -> QueryStats:
+        """Stops recording, logs N+1 patterns and keeps the summary"""
+        stats = self.__current.get()
+        if stats is None:
+            return None
+        self.__current.set(None)
+        for statement, n in stats.repeated(self.threshold).items():
+            logger.warning('Possible N+1 on %s: %d x %s',
+                           stats.label, n, statement)
+        with self.__lock:
+            self.recent.append(stats.to_dict(self.threshold))
+        return stats
+
+
+profiler = QueryProfiler()
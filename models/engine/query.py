@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Builds list queries for storage from request arguments"""
+from datetime import datetime, timedelta
+from typing import Mapping
+from sqlalchemy import and_, or_
+
+
+class ListQuery:
+    """
+    Filters, sort order and page window of a list request. Models may
+    declare `FILTERS` (attributes filtered by equality) and `SORT_KEYS`
+    (non-null attributes usable for ordering and cursors).
+    """
+
+    def __init__(self, cls, page=1, size=None, cursor: str = None,
+                 date_from: datetime = None, date_to: datetime = None,
+                 sort: str = 'created_at', order: str = 'desc',
+                 count=True, **filters) -> None:
+        """Initializes ListQuery instance"""
+        if sort not in getattr(cls, 'SORT_KEYS', ['created_at']):
+            raise ValueError('Invalid sort key: ' + str(sort))
+        if order not in ('asc', 'desc'):
+            raise ValueError('Invalid sort order: ' + str(order))
+        for key in filters:
+            if key not in getattr(cls, 'FILTERS', []):
+                raise ValueError('Invalid filter: ' + str(key))
+
+        self.cls = cls
+        self.page = page
+        self.size = size
+        self.cursor = cursor
+        self.date_from = date_from
+        self.date_to = date_to
+        self.sort = sort
+        self.order = order
+        self.count = count
+        self.filters = filters
+
+    @classmethod
+    def from_args(cls, model, args: Mapping[str, str]) -> 'ListQuery':
+        """
+        Returns a ListQuery of `model` from request `args`, raises
+        ValueError on malformed values
+        """
+        filters = {}
+        for key in getattr(model, 'FILTERS', []):
+            value = args.get(key)
+            if value is not None:
+                filters[key] = cls.coerce(model, key, value)
+
+        dates = {}
+        for key in ('date_from', 'date_to'):
+            value = args.get(key)
+            if value is not None:
+                try:
+                    dates[key] = datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise ValueError('Invalid {}: {}'.format(key, value))
+
+        count = {'false': False, 'estimate': 'estimate'}.get(
+            args.get('count'), True)
+
+        return cls(model, page=args.get('page', 1), size=args.get('size'),
+                   cursor=args.get('cursor'), sort=args.get(
+                       'sort', 'created_at'),
+                   order=args.get('order', 'desc'), count=count,
+                   **dates, **filters)
+
+    @staticmethod
+    def coerce(model, key: str, value: str):
+        """Converts a raw `value` to the python type of `model.key`"""
+        column = getattr(model, key)
+        enum_class = getattr(column.type, 'enum_class', None)
+        if enum_class is not None:
+            try:
+                return enum_class(value)
+            except ValueError:
+                raise ValueError('Invalid {}: {}'.format(key, value))
+        return value
+
+    @property
+    def signature(self) -> tuple:
+        """Hashable description of the filtered rows (not the window)"""
+        return (self.cls, self.date_from, self.date_to,
+                tuple(sorted(self.filters.items(), key=lambda x: x[0])))
+
+    @property
+    def filtered(self) -> bool:
+        """Returns True if any filter narrows the rows"""
+        return any([self.date_from, self.date_to, self.filters])
+
+    def apply(self, query):
+        """Returns `query` narrowed by the filters"""
+        cls = self.cls
+        if self.date_from is not None:
+            query = query.filter(cls.created_at >= self.date_from)
+        if self.date_to is not None:
+            # date_to is inclusive of the whole day
+            query = query.filter(
+                cls.created_at < self.date_to + timedelta(days=1))
+        for key, value in self.filters.items():
+            query = query.filter(getattr(cls, key) == value)
+        return query
+
+    def order_by(self, reverse: bool = False) -> list:
+        """Returns the ORDER BY clauses, optionally reversed"""
+        descending = (self.order == 'desc') != reverse
+        columns = [getattr(self.cls, self.sort), self.cls.id]
+        return [c.desc() if descending else c.asc() for c in columns]
+
+    def seek(self, value, id: str, reverse: bool = False):
+        """Returns the clause selecting rows after (`value`, `id`)"""
+        column = getattr(self.cls, self.sort)
+        descending = (self.order == 'desc') != reverse
+        if descending:
+            return or_(column < value, and_(column == value,
+                                            self.cls.id < id))
+        return or_(column > value, and_(column == value, self.cls.id > id))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Daily and monthly insert counts maintained alongside the models"""
+from models.base_model import Base
+from sqlalchemy import (
+    Table, Column, String, Integer, Date, event, select, func, and_
+)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import date, datetime
+from typing import Dict, List
+
+PERIODS = ['day', 'month']
+
+rollups = Table(
+    'rollups', Base.metadata,
+    Column('name', String(60), primary_key=True),
+    Column('period', String(10), primary_key=True),
+    Column('bucket', Date, primary_key=True),
+    Column('dimension', String(60), primary_key=True, default=''),
+    Column('value', String(60), primary_key=True, default=''),
+    Column('count', Integer, nullable=False, default=0),
+)
+
+
+def bucket(period: str, created_at: date) -> date:
+    """Returns the first day of the `period` holding `created_at`"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.date()
+    if period == 'month':
+        return date(created_at.year, created_at.month, 1)
+    return created_at
+
+
+def dimension_value(value) -> str:
+    """Returns the stored form of a dimension value"""
+    if value is None:
+        return ''
+    return str(getattr(value, 'value', value))
+
+
+def increments(cls, rows: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """
+    Returns the rollup increments of newly inserted `rows`: one total
+    and one per `cls.ROLLUP` dimension, for every period. A row may
+    stand for several inserts with a `_count` key.
+    """
+    counts = {}
+    for row in rows:
+        created_at = row.get('created_at') or datetime.utcnow()
+        if isinstance(created_at, str):
+            created_at = date.fromisoformat(created_at)
+        keys = [('', '')] + [
+            (dim, dimension_value(row.get(dim)))
+            for dim in getattr(cls, 'ROLLUP', [])
+        ]
+        for period in PERIODS:
+            for dim, value in keys:
+                key = (period, bucket(period, created_at), dim, value)
+                counts[key] = counts.get(key, 0) + row.get('_count', 1)
+    return [{'name': cls.__tablename__, 'period': period, 'bucket': day,
+             'dimension': dim, 'value': value, 'count': count}
+            for (period, day, dim, value), count in counts.items()]
+
+
+def record(connection, cls, rows: List[Dict[str, any]]) -> None:
+    """Adds the increments of `rows` to the rollup table on `connection`"""
+    params = increments(cls, rows)
+    if len(params) == 0:
+        return
+    if connection.dialect.name == 'mysql':
+        statement = mysql_insert(rollups)
+        statement = statement.on_duplicate_key_update(
+            count=rollups.c.count + statement.inserted['count'])
+    else:
+        statement = sqlite_insert(rollups)
+        statement = statement.on_conflict_do_update(
+            index_elements=[c for c in rollups.primary_key.columns],
+            set_={'count': rollups.c.count + statement.excluded['count']})
+    connection.execute(statement, params)
+
+
+def rebuild(connection, cls) -> None:
+    """Recomputes the rollup of `cls` from its table"""
+    connection.execute(rollups.delete().where(
+        rollups.c.name == cls.__tablename__))
+    dims = getattr(cls, 'ROLLUP', [])
+    columns = [func.date(cls.created_at)] + \
+        [getattr(cls, dim) for dim in dims]
+    rows = connection.execute(
+        select(*columns, func.count()).group_by(*columns)).all()
+    record(connection, cls, [
+        dict(zip(['created_at'] + dims + ['_count'], row)) for row in rows])
+
+
+def read(connection, cls, period: str = 'day', date_from: date = None,
+         date_to: date = None, dimension: str = '',
+         value=None) -> Dict[str, int]:
+    """Returns {bucket: count} of `cls` inserts, oldest bucket first"""
+    if period not in PERIODS:
+        raise ValueError('Invalid period: ' + str(period))
+    clauses = [rollups.c.name == cls.__tablename__,
+               rollups.c.period == period,
+               rollups.c.dimension == dimension,
+               rollups.c.value == dimension_value(value)]
+    if date_from is not None:
+        clauses.append(rollups.c.bucket >= bucket(period, date_from))
+    if date_to is not None:
+        clauses.append(rollups.c.bucket <= bucket(period, date_to))
+    rows = connection.execute(select(
+        rollups.c.bucket, func.sum(rollups.c.count)
+    ).where(and_(*clauses)).group_by(rollups.c.bucket).order_by(
+        rollups.c.bucket))
+    return {day.isoformat(): int(count) for day, count in rows}
+
+
+@event.listens_for(Base, 'after_insert', propagate=True)
+def after_insert(mapper, connection, target) -> None:
+    """Counts every flushed insert of a class declaring ROLLUP"""
+    cls = target.__class__
+    if getattr(cls, 'ROLLUP', None) is None:
+        return
+    record(connection, cls, [{
+        attr: getattr(target, attr)
+        for attr in ['created_at'] + cls.ROLLUP
+    }])
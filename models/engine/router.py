@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Read replica routing for the storage engine"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from functools import wraps
+from random import choice
+from threading import Lock
+from time import monotonic
+from os import getenv
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# replicas lagging more than REPLICA_MAX_LAG seconds are skipped
+REPLICA_MAX_LAG = float(getenv('REPLICA_MAX_LAG', 5))
+REPLICA_CHECK_INTERVAL = float(getenv('REPLICA_CHECK_INTERVAL', 5))
+
+
+def read_only(method):
+    """Routes the queries of a storage `method` to a read replica"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.reading():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Picks a healthy, caught-up read replica engine"""
+
+    def __init__(self, engines: list, max_lag: float = REPLICA_MAX_LAG,
+                 interval: float = REPLICA_CHECK_INTERVAL) -> None:
+        """Initializes ReplicaRouter instance"""
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.interval = interval
+        self.__health = {}
+        self.__lock = Lock()
+
+    def replica(self):
+        """Returns a replica engine, or None to fall back to the primary"""
+        healthy = [e for e in self.engines if self.healthy(e)]
+        if len(healthy) == 0:
+            return None
+        return choice(healthy)
+
+    def healthy(self, engine) -> bool:
+        """Returns True if `engine` lag was within bounds at last check"""
+        now = monotonic()
+        with self.__lock:
+            state = self.__health.get(engine)
+            if state is not None and now - state[1] < self.interval:
+                return state[0]
+            # claim the check so concurrent callers reuse the last state
+            self.__health[engine] = (state[0] if state else True, now)
+
+        try:
+            lag = self.lag(engine)
+            ok = lag is not None and lag <= self.max_lag
+        except SQLAlchemyError:
+            ok = False
+        with self.__lock:
+            self.__health[engine] = (ok, monotonic())
+        return ok
+
+    @staticmethod
+    def lag(engine) -> float:
+        """
+        Returns the replication lag of `engine` in seconds, None when
+        replication is broken. Non-MySQL engines report no lag.
+        """
+        with engine.connect() as conn:
+            if engine.dialect.name != 'mysql':
+                conn.execute(text('SELECT 1'))
+                return 0
+            try:
+                row = conn.execute(text('SHOW REPLICA STATUS')).mappings()
+            except SQLAlchemyError:
+                row = conn.execute(text('SHOW SLAVE STATUS')).mappings()
+            row = row.first()
+            if row is None:
+                return 0
+            lag = row.get('Seconds_Behind_Source',
+                          row.get('Seconds_Behind_Master'))
+            return None if lag is None else float(lag)
+
+
+class RoutingSession(Session):
+    """
+    Session sending reads issued from `storage.reading()` to a replica,
+    unless the session has written (read-your-writes) or is flushing
+    """
+
+    def __init__(self, router: ReplicaRouter = None, **kwargs) -> None:
+        """Initializes RoutingSession instance"""
+        self.router = router
+        super().__init__(**kwargs)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """Returns the engine the next statement runs on"""
+        if all([self.router is not None, self.info.get('reading'),
+                not self.info.get('sticky'), not self._flushing]):
+            # one replica per session keeps its reads consistent
+            if 'replica' not in self.info:
+                self.info['replica'] = self.router.replica()
+            if self.info['replica'] is not None:
+                return self.info['replica']
+        return super().get_bind(mapper, clause=clause, **kwargs)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Atomic sequence allocator for `index` and serial numbers"""
+from models.base_model import Base
+from sqlalchemy import (
+    Table, Column, String, Integer, select, update, insert, func
+)
+from sqlalchemy.exc import IntegrityError
+from threading import Lock
+from os import getenv
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# number of values reserved per round trip, per worker
+SEQUENCE_BLOCK = int(getenv('SEQUENCE_BLOCK', 1))
+SEQUENCE_BACKEND = getenv('SEQUENCE_BACKEND', 'db')
+
+sequences = Table(
+    'sequences', Base.metadata,
+    Column('name', String(60), primary_key=True),
+    Column('value', Integer, nullable=False, default=0),
+)
+
+
+class SequenceAllocator:
+    """
+    Hands out unique, increasing values per class. Values are reserved
+    in blocks of `block` from a counter row (or a Redis INCRBY key) and
+    served from memory until the block runs out.
+    """
+
+    key = 'sequences:{}'
+
+    def __init__(self, engine, redis=None, block: int = SEQUENCE_BLOCK,
+                 backend: str = SEQUENCE_BACKEND) -> None:
+        """Initializes SequenceAllocator instance"""
+        self.engine = engine
+        self.redis = redis if backend == 'redis' else None
+        self.block = max(int(block), 1)
+        self.__blocks = {}
+        self.__seeded = set()
+        self.__lock = Lock()
+
+    def next(self, cls, conn=None) -> int:
+        """
+        Returns the next value of the `cls` sequence. With a `conn`,
+        one value is reserved in that connection's transaction instead
+        of a block on a connection of its own.
+        """
+        if conn is not None and self.redis is None:
+            return self.__increment(conn, cls, 1)
+        name = cls.__tablename__
+        with self.__lock:
+            current, last = self.__blocks.get(name, (1, 0))
+            if current > last:
+                current, last = self.reserve(cls)
+            self.__blocks[name] = (current + 1, last)
+            return current
+
+    def reserve(self, cls) -> tuple:
+        """Reserves a new block and returns its (first, last) values"""
+        if self.redis is not None:
+            last = self.__reserve_redis(cls)
+        else:
+            last = self.__reserve_db(cls)
+        return last - self.block + 1, last
+
+    def reset(self) -> None:
+        """Drops every block held in memory"""
+        with self.__lock:
+            self.__blocks.clear()
+            self.__seeded.clear()
+
+    @staticmethod
+    def __seed(conn, cls) -> int:
+        """Returns the current highest index stored for `cls`"""
+        return conn.execute(select(func.max(cls.index))).scalar() or 0
+
+    def __reserve_db(self, cls) -> int:
+        """Reserves a block from the `sequences` table"""
+        name = cls.__tablename__
+        if name not in self.__seeded:
+            try:
+                with self.engine.begin() as conn:
+                    exists = conn.execute(select(sequences.c.name).where(
+                        sequences.c.name == name)).first()
+                    if exists is None:
+                        conn.execute(insert(sequences).values(
+                            name=name, value=self.__seed(conn, cls)))
+            except IntegrityError:
+                # another worker created the row first
+                pass
+            self.__seeded.add(name)
+
+        # the UPDATE holds the row lock until commit
+        with self.engine.begin() as conn:
+            return self.__increment(conn, cls, self.block)
+
+    def __increment(self, conn, cls, size: int) -> int:
+        """Adds `size` to the `cls` counter row, returns its new value"""
+        name = cls.__tablename__
+        conn.execute(update(sequences).where(
+            sequences.c.name == name
+        ).values(value=sequences.c.value + size))
+        value = conn.execute(select(sequences.c.value).where(
+            sequences.c.name == name)).scalar()
+        if value is None:
+            value = self.__seed(conn, cls) + size
+            conn.execute(insert(sequences).values(name=name, value=value))
+        return value
+
+    def __reserve_redis(self, cls) -> int:
+        """Reserves a block with Redis INCRBY"""
+        key = self.key.format(cls.__tablename__)
+        if cls.__tablename__ not in self.__seeded:
+            with self.engine.connect() as conn:
+                self.redis.set(key, self.__seed(conn, cls), nx=True)
+            self.__seeded.add(cls.__tablename__)
+        return int(self.redis.incrby(key, self.block))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Per-class row serializers compiled from the model's columns"""
+from sqlalchemy import DateTime, Date, Enum
+from functools import lru_cache
+from typing import Dict, List
+
+
+def _datetime(value):
+    """Formats a datetime as BaseModel.to_dict does"""
+    return None if value is None else value.isoformat() + '+0000'
+
+
+def _date(value):
+    """Formats a date as BaseModel.to_dict does"""
+    return None if value is None else value.isoformat() + 'T00:00+0000'
+
+
+def _enum(value):
+    """Returns the value of an Enum member"""
+    return None if value is None else value.value
+
+
+class Serializer:
+    """
+    Serializes rows selecting `columns` into the same dictionary as
+    `cls.to_dict(detailed)`, without hydrating ORM objects. Models
+    declare `HIDDEN_ATTRS` (never serialized) and `DETAILED_ATTRS`
+    (only serialized when detailed).
+    """
+
+    def __init__(self, cls, detailed: bool = False) -> None:
+        """Compiles the serializer of `cls`"""
+        skip = set(getattr(cls, 'HIDDEN_ATTRS', []))
+        if detailed is not True:
+            skip.update(getattr(cls, 'DETAILED_ATTRS', []))
+
+        self.cls = cls
+        self.keys = []
+        self.converters = []
+        for prop in cls.__mapper__.column_attrs:
+            if prop.key in skip:
+                continue
+            column_type = prop.columns[0].type
+            if isinstance(column_type, DateTime):
+                converter = _datetime
+            elif isinstance(column_type, Date):
+                converter = _date
+            elif isinstance(column_type, Enum) and column_type.enum_class:
+                converter = _enum
+            else:
+                converter = None
+            self.keys.append(prop.key)
+            self.converters.append(converter)
+        self.size = len(self.keys)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def for_class(cls, detailed: bool = False) -> 'Serializer':
+        """Returns the compiled serializer of `cls`, built once"""
+        return Serializer(cls, detailed)
+
+    def columns(self, extra: List[str] = None) -> list:
+        """
+        Returns the column attributes to select, serialized ones first,
+        followed by the `extra` ones not already selected
+        """
+        extra = extra or []
+        keys = self.keys + [key for key in extra if key not in self.keys]
+        return [getattr(self.cls, key) for key in keys]
+
+    def __call__(self, row) -> Dict[str, any]:
+        """Returns the dictionary of a row selected with `columns()`"""
+        obj = {}
+        for key, converter, value in zip(self.keys, self.converters, row):
+            obj[key] = value if converter is None else converter(value)
+        return obj
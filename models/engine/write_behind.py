@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Write-behind buffer coalescing frequent column updates"""
+from sqlalchemy import update, bindparam, DateTime
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Dict, Tuple
+from os import getenv
+from dotenv import load_dotenv
+import atexit
+import logging
+
+load_dotenv()
+
+# seconds between batched flushes of buffered updates
+WRITE_BEHIND_INTERVAL = float(getenv('WRITE_BEHIND_INTERVAL', 60))
+WRITE_BEHIND_BACKEND = getenv('WRITE_BEHIND_BACKEND', 'memory')
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Keeps the latest value of (class, id, attribute) updates in memory
+    (or a Redis hash shared by workers) and writes them with one
+    batched UPDATE per class and attribute every `interval` seconds,
+    from a daemon thread started by the first update of the process
+    """
+
+    key = 'write_behind'
+
+    def __init__(self, engine, classes: list, redis=None,
+                 interval: float = WRITE_BEHIND_INTERVAL,
+                 backend: str = WRITE_BEHIND_BACKEND) -> None:
+        """Initializes WriteBehindBuffer instance"""
+        self.engine = engine
+        self.classes = {cls.__tablename__: cls for cls in classes}
+        self.redis = redis if backend == 'redis' else None
+        self.interval = interval
+        self.__pending = {}
+        self.__lock = Lock()
+        self.__thread = None
+        self.__stopped = Event()
+        atexit.register(self.stop)
+
+    def record(self, cls, id: str, attr: str, value) -> None:
+        """Buffers `cls.attr = value` for the row `id`"""
+        field = '{}|{}|{}'.format(cls.__tablename__, id, attr)
+        if self.redis is not None:
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            self.redis.hset(self.key, field, value)
+        else:
+            with self.__lock:
+                self.__pending[field] = value
+        if self.interval <= 0:
+            self.flush()
+        elif self.__thread is None or not self.__thread.is_alive():
+            self.__start()
+
+    def __start(self) -> None:
+        """Starts the flushing thread, again in a forked worker"""
+        with self.__lock:
+            if self.__thread is not None and self.__thread.is_alive():
+                return
+            self.__thread = Thread(target=self.__run, daemon=True,
+                                   name='write-behind')
+            self.__thread.start()
+
+    def __run(self) -> None:
+        """Flushes every `interval` seconds until stopped"""
+        while not self.__stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Write-behind flush failed')
+
+    def stop(self) -> None:
+        """Stops the flushing thread and writes what is left"""
+        self.__stopped.set()
+        self.flush()
+
+    def __take(self) -> Dict[str, any]:
+        """Removes and returns every buffered update"""
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hgetall(self.key)
+            pipe.delete(self.key)
+            items = pipe.execute()[0]
+            return {k.decode('utf-8'): v.decode('utf-8')
+                    for k, v in items.items()}
+        with self.__lock:
+            items, self.__pending = self.__pending, {}
+        return items
+
+    def flush(self) -> int:
+        """Writes the buffered updates, returns the number of rows"""
+        groups: Dict[Tuple[str, str], list] = {}
+        for field, value in self.__take().items():
+            table, id, attr = field.split('|', 2)
+            groups.setdefault((table, attr), []).append(
+                {'_id': id, '_value': value})
+
+        written = 0
+        for (table, attr), params in groups.items():
+            cls = self.classes.get(table)
+            if cls is None:
+                continue
+            column = cls.__table__.columns[attr]
+            if isinstance(column.type, DateTime):
+                for param in params:
+                    if isinstance(param['_value'], str):
+                        param['_value'] = datetime.fromisoformat(
+                            param['_value'])
+            statement = update(cls.__table__).where(
+                cls.__table__.c.id == bindparam('_id')
+            ).values({attr: bindparam('_value')})
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(statement, params)
+                written += len(params)
+            except SQLAlchemyError as exc:
+                logger.warning('Write-behind flush of %s.%s failed: %s',
+                               table, attr, exc)
+        return written
@@ -4,7 +4,7 @@
 from typing import Dict
 from models.base_model import Base, BaseModel
 from sqlalchemy import (
-    Column, String, Enum, Text
+    Column, String, Enum, Text, Index, func
 )
 from models.user.auth import UserAuth
 from .role import Role
@@ -24,6 +24,28 @@ class User(BaseModel, Base, UserAuth):
     role = Column(Enum(Role), default=Role.user, nullable=False)
     status = Column(Enum(Status), default=Status.inactive, nullable=False)
 
+    # attributes matched case-insensitively by storage.match
+    CASE_INSENSITIVE = ['email']
+
+    # attributes list requests may filter and sort on
+    FILTERS = ['role', 'status']
+    SORT_KEYS = ['created_at', 'updated_at', 'email']
+
+    # dimensions of the daily/monthly signup rollup
+    ROLLUP = ['role', 'status']
+
+    # attributes never serialized, and only serialized when detailed
+    HIDDEN_ATTRS = ['_password', 'reset_token']
+    DETAILED_ATTRS = ['created_at', 'updated_at', 'email', 'last_session']
+
+    # attributes authenticated requests are served from, see Principal
+    PRINCIPAL_ATTRS = ['id', 'role', 'status', 'updated_at', 'last_session']
+
+    __table_args__ = (
+        Index('ix_users_email_lower', func.lower(email)),
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
     def to_dict(self, detailed=False) -> Dict[str, str]:
         """Overrides parent's defualt"""
         obj = super().to_dict()
@@ -35,15 +57,13 @@ class User(BaseModel, Base, UserAuth):
                 obj.update({attr: getattr(self, attr)})
 
         # sensitive attributes
-        attrs = ['_password', 'reset_token']
-        for attr in attrs:
+        for attr in self.HIDDEN_ATTRS:
             if attr in obj:
                 obj.pop(attr)
 
         # detailed attributes
-        attrs = ['created_at', 'updated_at', 'email', 'last_session']
         if detailed is not True:
-            for attr in attrs:
+            for attr in self.DETAILED_ATTRS:
                 if attr in obj:
                     obj.pop(attr)
 
@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 """User authentication module"""
 from sqlalchemy import Column, String, DateTime
-import bcrypt
+from models.user.hasher import hasher
 from uuid import uuid4
 from base64 import b64encode, b64decode
 from datetime import datetime
+from typing import List
+
+
+def hash_password(value: str) -> bytes:
+    """Returns the bcrypt hash of `value`"""
+    if value is None or value == '':
+        raise ValueError('User password cannot be null or empty string')
+    return hasher.hash(value)
+
+
+def hash_passwords(values: List[str]) -> List[bytes]:
+    """Returns the bcrypt hashes of `values`, computed in a process pool"""
+    for value in values:
+        if value is None or value == '':
+            raise ValueError('User password cannot be null or empty string')
+    return hasher.hash_many(values)
 
 
 class UserAuth:
 
-    reset_token = Column(String(255), nullable=True)
+    reset_token = Column(String(255), nullable=True, index=True)
     _password = Column(String(255), nullable=True)
     last_session = Column(DateTime, default=datetime.utcnow)
 
@@ -24,20 +40,20 @@ class UserAuth:
         User password setter: hash with bcrypt before
         storing in the database.
         """
-        if value is None or value == '':
-            raise ValueError('User password cannot be null or empty string')
-        self._password = bcrypt.hashpw(
-            value.encode('utf-8'), bcrypt.gensalt(4)
-        )
+        self._password = hash_password(value)
 
     def is_valid_password(self, password: str) -> bool:
-        """Validate if password is a valid user password"""
+        """
+        Validate if password is a valid user password, upgrading its
+        hash when the configured cost factor changed
+        """
         user_password = self.password
-        if isinstance(user_password, str):
-            user_password = user_password.encode('utf-8')
-        return bcrypt.checkpw(
-            password.encode('utf-8'), user_password
-        )
+        if user_password is None:
+            return False
+        valid = hasher.check(password, user_password)
+        if valid and hasher.needs_rehash(user_password):
+            self._password = hasher.hash(password)
+        return valid
 
     def is_valid_reset_token(self, reset_token: str) -> bool:
         """Validate if token is a valid user reset token"""
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Password hashing service running bcrypt off the request thread"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from threading import BoundedSemaphore, Lock
+from typing import List
+from os import getenv, cpu_count
+from dotenv import load_dotenv
+import bcrypt
+
+load_dotenv()
+
+# bcrypt cost factor, hashes of another cost are upgraded on login
+BCRYPT_ROUNDS = int(getenv('BCRYPT_ROUNDS', 4))
+# processes hashing per worker, 0 hashes in the calling thread
+BCRYPT_WORKERS = int(getenv('BCRYPT_WORKERS', cpu_count() or 1))
+# hash/check calls queued or running at once before refusing more
+BCRYPT_QUEUE = int(getenv('BCRYPT_QUEUE', max(BCRYPT_WORKERS, 1) * 4))
+# seconds a call may wait for its result
+BCRYPT_TIMEOUT = float(getenv('BCRYPT_TIMEOUT', 10))
+
+
+class HasherOverloaded(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def hashpw(value: str, rounds: int) -> bytes:
+    """Returns the bcrypt hash of `value` with cost `rounds`"""
+    return bcrypt.hashpw(value.encode('utf-8'), bcrypt.gensalt(rounds))
+
+
+def checkpw(value: str, hashed: bytes) -> bool:
+    """Returns True if `value` matches the bcrypt `hashed`"""
+    return bcrypt.checkpw(value.encode('utf-8'), hashed)
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords in a bounded process pool, created on
+    first use. At most `queue` calls wait or run at once, the next
+    ones raise HasherOverloaded instead of piling up. A slot is held
+    until its job is done, even when the caller stopped waiting.
+    """
+
+    def __init__(self, workers: int = BCRYPT_WORKERS,
+                 queue: int = BCRYPT_QUEUE, rounds: int = BCRYPT_ROUNDS,
+                 timeout: float = BCRYPT_TIMEOUT) -> None:
+        """Initializes PasswordHasher instance"""
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        self.__slots = BoundedSemaphore(max(queue, 1))
+        self.__bulk = BoundedSemaphore(max(workers, 1))
+        self.__pool = None
+        self.__lock = Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Returns the process pool, starting it on first use"""
+        if self.__pool is None:
+            with self.__lock:
+                if self.__pool is None:
+                    self.__pool = ProcessPoolExecutor(
+                        max_workers=self.workers)
+        return self.__pool
+
+    def __submit(self, func, *args):
+        """
+        Submits func(*args) to the pool with a queue slot already
+        taken, the slot is released once the job is done
+        """
+        try:
+            future = self.pool.submit(func, *args)
+        except Exception:
+            self.__slots.release()
+            raise
+        future.add_done_callback(lambda _: self.__slots.release())
+        return future
+
+    def __run(self, func, *args):
+        """Runs func(*args) in the pool, within the queue limit"""
+        if self.workers <= 0:
+            return func(*args)
+        if not self.__slots.acquire(blocking=False):
+            raise HasherOverloaded('Password hashing queue is full')
+        try:
+            return self.__submit(func, *args).result(self.timeout)
+        except TimeoutError:
+            raise HasherOverloaded('Password hashing timed out')
+
+    def hash(self, value: str) -> bytes:
+        """Returns the bcrypt hash of `value`"""
+        return self.__run(hashpw, value, self.rounds)
+
+    def check(self, value: str, hashed) -> bool:
+        """Returns True if `value` matches `hashed`"""
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self.__run(checkpw, value, hashed)
+
+    def hash_many(self, values: List[str]) -> List[bytes]:
+        """
+        Returns the bcrypt hashes of `values`, e.g. for bulk imports.
+        Each hash takes a queue slot, waiting for one if needed, and at
+        most `workers` run at once so logins keep the rest of the queue.
+        """
+        if self.workers <= 0:
+            return [hashpw(value, self.rounds) for value in values]
+        futures = []
+        for value in values:
+            if not self.__bulk.acquire(timeout=self.timeout):
+                raise HasherOverloaded('Password hashing timed out')
+            if not self.__slots.acquire(timeout=self.timeout):
+                self.__bulk.release()
+                raise HasherOverloaded('Password hashing queue is full')
+            try:
+                future = self.__submit(hashpw, value, self.rounds)
+            except Exception:
+                self.__bulk.release()
+                raise
+            future.add_done_callback(lambda _: self.__bulk.release())
+            futures.append(future)
+        try:
+            return [future.result(self.timeout) for future in futures]
+        except TimeoutError:
+            raise HasherOverloaded('Password hashing timed out')
+
+    def needs_rehash(self, hashed) -> bool:
+        """Returns True if `hashed` was made with another cost factor"""
+        if isinstance(hashed, bytes):
+            hashed = hashed.decode('utf-8')
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
+
+    def shutdown(self) -> None:
+        """Stops the process pool"""
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Bulk User import module"""
+from typing import Dict, List
+from models.user.auth import hash_passwords
+from models.user.role import Role
+from models.user.status import Status
+
+# attributes a bulk import may set
+IMPORT_ATTRS = ['firstname', 'lastname', 'email', 'password',
+                'image', 'role', 'status']
+
+
+def import_users(rows: List[Dict[str, str]],
+                 upsert: bool = False) -> Dict[str, any]:
+    """
+    Validates `rows`, hashes their passwords in a process pool and
+    writes them with storage.bulk_save.
+    Returns {"saved": int, "errors": [{"row": int, "message": str}]}
+    """
+    from models import storage
+    from models.user import User
+
+    errors = []
+    valid = []
+    seen = set()
+    for number, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('Row is not an object')
+            email = row.get('email')
+            if not isinstance(email, str) or '@' not in email:
+                raise ValueError('Missing or invalid email')
+            if not row.get('password'):
+                raise ValueError('Missing required data: password')
+            if not isinstance(row.get('password'), str):
+                raise ValueError('Invalid password: must be a string')
+            if email.lower() in seen:
+                raise ValueError('Duplicate email in import: ' + email)
+            seen.add(email.lower())
+            valid.append((number, {
+                'firstname': row.get('firstname') or None,
+                'lastname': row.get('lastname') or None,
+                'email': email,
+                'image': row.get('image') or None,
+                'role': Role(row.get('role') or Role.user.value),
+                'status': Status(row.get('status') or Status.inactive.value),
+                '_password': row.get('password'),
+            }))
+        except ValueError as exc:
+            errors.append({"row": number, "message": str(exc)})
+
+    if not upsert:
+        taken = storage.existing(User, 'email',
+                                 [row['email'] for _, row in valid])
+        for number, row in valid:
+            if row['email'].lower() in taken:
+                errors.append({"row": number, "message":
+                               'Email already exists: ' + row['email']})
+        valid = [(n, row) for n, row in valid
+                 if row['email'].lower() not in taken]
+
+    hashes = hash_passwords([row['_password'] for _, row in valid])
+    for (_, row), hashed in zip(valid, hashes):
+        row['_password'] = hashed
+
+    report = storage.bulk_save(User, [row for _, row in valid],
+                               upsert=['email'] if upsert else None)
+
+    # map chunk positions back to the submitted row numbers
+    for error in report['errors']:
+        error['row'] = valid[error['row']][0]
+    report['errors'] = sorted(errors + report['errors'],
+                              key=lambda x: x['row'])
+    return report